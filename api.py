@@ -4,10 +4,12 @@ Run: uvicorn api:app --reload
 Docs: http://localhost:8000/docs
 """
 
-from fastapi import FastAPI, Query
+from fastapi import BackgroundTasks, FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
+from classifier import SECONDARY_MIN_SCORE
 from database import init_db, get_all_tools, get_category_stats, get_tool_count
 from llm_engine import recommend_tool_for_task, generate_trend_summary
+from pipeline import enrich_pending_tools, get_tool_enriched
 from typing import Optional
 
 app = FastAPI(
@@ -38,15 +40,34 @@ def root():
 def list_tools(
     category: Optional[str] = Query(None, description="Filter by category"),
     search: Optional[str] = Query(None, description="Search by name/description"),
+    secondary: bool = Query(False, description="Also match tools with `category` as a secondary category"),
 ):
     """Get all tools with optional filters."""
-    return {"tools": get_all_tools(category=category, search=search)}
+    return {"tools": get_all_tools(category=category, search=search, include_secondary=secondary,
+                                   min_score=SECONDARY_MIN_SCORE)}
+
+
+@app.get("/tools/{tool_id}")
+def tool_detail(tool_id: int):
+    """Get one tool; lazily-classified tools are LLM-enriched on first request."""
+    tool = get_tool_enriched(tool_id)
+    if tool is None:
+        raise HTTPException(status_code=404, detail="Tool not found")
+    return tool
+
+
+@app.post("/enrich")
+def enrich_pending(background_tasks: BackgroundTasks, limit: Optional[int] = Query(None, description="Max tools to enrich")):
+    """Drain the lazy-enrichment queue in the background."""
+    background_tasks.add_task(enrich_pending_tools, limit)
+    return {"status": "started"}
 
 
 @app.get("/stats")
-def category_stats():
+def category_stats(secondary: bool = Query(False, description="Count secondary categories too")):
     """Get tool count per category."""
-    return {"stats": get_category_stats(), "total": get_tool_count()}
+    return {"stats": get_category_stats(include_secondary=secondary, min_score=SECONDARY_MIN_SCORE),
+            "total": get_tool_count()}
 
 
 @app.get("/recommend")
@@ -0,0 +1,113 @@
+"""
+archive.py - Content-addressed archive of raw scraper payloads + offline replay
+Every README / Spaces JSON page / rendered TAAFT HTML is stored once, gzipped,
+under its sha256; each scrape run writes a manifest of what it fetched.
+A manifest can then be replayed through the scrapers with no network.
+"""
+
+import gzip
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import Dict, List, Optional
+
+ARCHIVE_DIR = "raw_archive"
+ARCHIVE_RAW_PAYLOADS = True     # archive every live scrape run
+
+
+def _object_path(sha: str) -> str:
+    return os.path.join(ARCHIVE_DIR, "objects", sha[:2], f"{sha}.gz")
+
+
+def _run_path(run_id: str) -> str:
+    return os.path.join(ARCHIVE_DIR, "runs", f"{run_id}.json")
+
+
+def put_object(body: str) -> str:
+    """Store a payload (deduplicated by content). Returns its sha256."""
+    data = body.encode("utf-8")
+    sha = hashlib.sha256(data).hexdigest()
+    path = _object_path(sha)
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.tmp"
+        with gzip.open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)
+    return sha
+
+
+def get_object(sha: str) -> str:
+    with gzip.open(_object_path(sha), "rb") as f:
+        return f.read().decode("utf-8")
+
+
+class ArchiveRun:
+    """Collects the payloads of one scrape run; close() writes its manifest."""
+
+    def __init__(self, run_id: str = None):
+        # Microseconds keep runs started within the same second apart (and still sortable)
+        self.run_id = run_id or datetime.now().strftime("%Y%m%d-%H%M%S-%f")
+        self.started_at = datetime.now().isoformat()
+        self.payloads: List[Dict] = []
+
+    def record(self, source: str, url: str, body: str, next_url: str = None):
+        self.payloads.append({
+            "source": source,
+            "url": url,
+            "sha256": put_object(body),
+            "chars": len(body),
+            "next_url": next_url,
+        })
+
+    def close(self):
+        os.makedirs(os.path.dirname(_run_path(self.run_id)), exist_ok=True)
+        # "x": never overwrite another run's manifest
+        with open(_run_path(self.run_id), "x", encoding="utf-8") as f:
+            json.dump({
+                "run_id": self.run_id,
+                "started_at": self.started_at,
+                "finished_at": datetime.now().isoformat(),
+                "payloads": self.payloads,
+            }, f, indent=2)
+        print(f"[Archive] Saved run {self.run_id} ({len(self.payloads)} payloads)")
+
+
+def list_runs() -> List[str]:
+    runs_dir = os.path.join(ARCHIVE_DIR, "runs")
+    if not os.path.isdir(runs_dir):
+        return []
+    return sorted(f[:-5] for f in os.listdir(runs_dir) if f.endswith(".json"))
+
+
+class ReplayArchive:
+    """Read side of a run manifest: archived body / next page per URL."""
+
+    def __init__(self, manifest: Dict):
+        self.run_id = manifest["run_id"]
+        self._by_url = {p["url"]: p for p in manifest["payloads"]}
+
+    def body(self, url: str) -> Optional[str]:
+        payload = self._by_url.get(url)
+        return get_object(payload["sha256"]) if payload else None
+
+    def next_url(self, url: str) -> Optional[str]:
+        payload = self._by_url.get(url)
+        return payload.get("next_url") if payload else None
+
+
+def load_run(run_id: str = "latest") -> ReplayArchive:
+    """Open an archived run for replay ("latest" = most recent)."""
+    if run_id == "latest":
+        runs = list_runs()
+        if not runs:
+            raise FileNotFoundError(f"No archived runs in {ARCHIVE_DIR}/")
+        run_id = runs[-1]
+    with open(_run_path(run_id), encoding="utf-8") as f:
+        return ReplayArchive(json.load(f))
+
+
+if __name__ == "__main__":
+    for run_id in list_runs():
+        print(f"  - {run_id}")
@@ -0,0 +1,254 @@
+"""
+bench_classifier.py - Offline classifier accuracy-vs-cost benchmark
+Runs hybrid_classify() over a labelled fixture set for a grid of thresholds
+(keyword confidence normalizer, KEYWORD_ONLY_CONFIDENCE, local-model
+confidence, eager vs lazy enrichment) and reports accuracy, LLM-call rate,
+estimated Groq tokens, run time (the inline LLM calls) and total wall time
+per configuration. Lazy mode's queued tools are scored as they end up after
+enrich_pending_tools(), and counted as deferred LLM calls — in the tokens,
+the total-calls column and the Pareto front too, since the same quota pays
+for them later.
+The LLM is simulated: it answers each tool's recorded llm_category, or —
+when none is recorded — the gold label on a fixed LLM_ACCURACY share of the
+tools (chosen by name hash) and a plausible wrong category on the rest, so
+trusting keywords over the LLM has an upside as well as a cost. --live
+records Groq's real answers first (one call per fixture tool), so the sweep
+itself never touches the API.
+Run: python bench_classifier.py --pareto
+     python bench_classifier.py --from-db --live --modes lazy
+"""
+
+import argparse
+import asyncio
+import hashlib
+import itertools
+import json
+import time
+from typing import Dict, List, Optional
+
+import classifier
+from classifier import classification_text, hybrid_classify, keyword_classify_batch
+from groq_quota import CHARS_PER_TOKEN, GROQ_RPM_LIMIT, GROQ_TPM_LIMIT
+from llm_async import MAX_IN_FLIGHT, AsyncGroqEngine
+from llm_engine import CATEGORIES, SYSTEM_PROMPT, classification_prompt
+from local_model import LOCAL_MODEL_CONFIDENCE, LOCAL_MODEL_PATH, LocalModel, load_model
+
+FIXTURES_PATH = "classifier_fixtures.jsonl"
+
+EST_COMPLETION_TOKENS = 150      # typical size of the enrichment JSON
+LLM_SECONDS = 1.0                # assumed Groq round trip when not measured with --live
+LLM_ACCURACY = 0.9               # assumed share of gold labels the LLM gets right, where none is recorded
+
+DEFAULT_NORMS = [0.2, 0.3, 0.4, 0.5]
+DEFAULT_KEYWORD_ONLY = [0.5, 0.6, 0.7, 0.8, 0.9, 1.0]
+DEFAULT_LOCAL_THRESHOLDS = [0.5, 0.6, 0.7, 0.8, 0.9]
+
+
+def load_fixtures(path: str = FIXTURES_PATH) -> List[Dict]:
+    """[{"name", "description", "category", "category_hint"?, "llm_category"?}] from a JSONL file."""
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def fixtures_from_db() -> List[Dict]:
+    """The LLM-labelled rows of the tools table — accuracy then means agreement with the LLM."""
+    from database import get_llm_labelled_tools
+    return get_llm_labelled_tools()
+
+
+def record_live_answers(fixtures: List[Dict]) -> float:
+    """Ask Groq once per fixture; stores llm_category on each and returns the mean call latency."""
+    async def record_all() -> float:
+        async with AsyncGroqEngine() as engine:
+            async def record(fixture):
+                enrichment = await engine.classify_and_enrich(fixture["name"], fixture["description"])
+                fixture["llm_category"] = enrichment["category"]
+                print(f"  [{engine.calls}/{len(fixtures)}] {fixture['name']}: {fixture['llm_category']}")
+
+            await asyncio.gather(*map(record, fixtures))
+            return engine.api_seconds / max(engine.calls, 1)
+
+    return asyncio.run(record_all())
+
+
+def estimate_llm_seconds(calls: int, tokens: int, llm_seconds: float) -> float:
+    """Wall time of `calls` Groq calls: bound by concurrency, requests/min or tokens/min, whichever is slowest."""
+    return max(calls * llm_seconds / MAX_IN_FLIGHT, calls * 60 / GROQ_RPM_LIMIT, tokens * 60 / GROQ_TPM_LIMIT)
+
+
+def estimate_tokens(name: str, description: str) -> int:
+    """Prompt + completion tokens of one classify_and_enrich_tool() call."""
+    prompt_chars = len(SYSTEM_PROMPT) + len(classification_prompt(name, description))
+    return prompt_chars // CHARS_PER_TOKEN + EST_COMPLETION_TOKENS
+
+
+def simulated_llm_category(fixture: Dict, category_scores: Dict[str, float], llm_accuracy: float) -> str:
+    """
+    The simulated LLM's answer for a fixture: its recorded llm_category, else
+    the gold label for a deterministic llm_accuracy share of names and
+    otherwise a wrong one — a runner-up keyword category when there is one.
+    """
+    if fixture.get("llm_category"):
+        return fixture["llm_category"]
+    gold = fixture["category"]
+    draw = int.from_bytes(hashlib.sha256(fixture["name"].encode("utf-8")).digest()[:8], "big") / 2 ** 64
+    if draw < llm_accuracy:
+        return gold
+    wrong = [c for c in category_scores if c != gold] or [c for c in CATEGORIES if c not in (gold, "Other")]
+    return wrong[int(draw * 1000) % len(wrong)]
+
+
+def _set_thresholds(norm: float, keyword_only: float, local_threshold: Optional[float]):
+    classifier.KEYWORD_CONFIDENCE_NORM = norm
+    classifier.KEYWORD_ONLY_CONFIDENCE = keyword_only
+    if local_threshold is not None:
+        classifier.LOCAL_MODEL_CONFIDENCE = local_threshold
+
+
+def evaluate(fixtures: List[Dict], norm: float, keyword_only: float, lazy: bool,
+             local_model: Optional[LocalModel] = None, local_threshold: Optional[float] = None,
+             llm_seconds: float = LLM_SECONDS, llm_accuracy: float = LLM_ACCURACY) -> Dict:
+    """Classify every fixture under one configuration and score it against the gold labels."""
+    _set_thresholds(norm, keyword_only, local_threshold)
+    calls = tokens = deferred = 0
+    inline_tokens = 0
+
+    def simulated_llm(name: str, description: str) -> Dict:
+        nonlocal calls, tokens, inline_tokens
+        calls += 1
+        tokens += estimate_tokens(name, description)
+        inline_tokens += estimate_tokens(name, description)
+        return {"category": llm_category, "best_for_tasks": [],
+                "summary": description[:200], "audience_fit": {}, "tags": [], "pricing_hint": "Unknown"}
+
+    correct = 0
+    start = time.perf_counter()
+    texts = [classification_text(f["name"], f["description"], f.get("category_hint")) for f in fixtures]
+    labels, confidences, category_scores = keyword_classify_batch(texts)
+    for fixture, label, confidence, scores in zip(fixtures, labels, confidences, category_scores):
+        llm_category = simulated_llm_category(fixture, scores, llm_accuracy)
+        result = hybrid_classify(fixture["name"], fixture["description"], simulated_llm,
+                                 category_hint=fixture.get("category_hint"),
+                                 keyword_result=(str(label), float(confidence)), lazy_enrichment=lazy,
+                                 local_fn=local_model.predict if local_model else None,
+                                 category_scores=scores)
+        category = result["category"]
+        if result.get("enrichment_status") == "pending":
+            deferred += 1
+            tokens += estimate_tokens(fixture["name"], fixture["description"])
+            # pipeline.enrich_tool_record() lets the LLM pick a multi-label tool's primary category
+            if result["classification_method"] == "keyword_multi" and llm_category in result["category_scores"]:
+                category = llm_category
+        correct += category == fixture["category"]
+    cpu_seconds = time.perf_counter() - start
+
+    n = max(len(fixtures), 1)
+    return {
+        "norm": norm,
+        "keyword_only": keyword_only,
+        "local_threshold": local_threshold,
+        "lazy": lazy,
+        "accuracy": correct / n,
+        "llm_rate": calls / n,
+        "deferred_rate": deferred / n,
+        "total_rate": (calls + deferred) / n,
+        "tokens": tokens,
+        "cpu_seconds": cpu_seconds,
+        # The simulated LLM answers instantly — add the real calls, scheduled within the
+        # Groq quota: the ones the run waits on, and all of them (deferred ones included)
+        "est_run_seconds": cpu_seconds + estimate_llm_seconds(calls, inline_tokens, llm_seconds),
+        "est_seconds": cpu_seconds + estimate_llm_seconds(calls + deferred, tokens, llm_seconds),
+    }
+
+
+def run_sweep(fixtures: List[Dict], norms: List[float] = None, keyword_only: List[float] = None,
+              modes: List[str] = ("eager", "lazy"), local_model: Optional[LocalModel] = None,
+              local_thresholds: List[float] = None, llm_seconds: float = LLM_SECONDS,
+              llm_accuracy: float = LLM_ACCURACY) -> List[Dict]:
+    """evaluate() over the full grid; the classifier's thresholds are restored afterwards."""
+    defaults = (classifier.KEYWORD_CONFIDENCE_NORM, classifier.KEYWORD_ONLY_CONFIDENCE,
+                classifier.LOCAL_MODEL_CONFIDENCE)
+    thresholds = (local_thresholds or DEFAULT_LOCAL_THRESHOLDS) if local_model else [None]
+    grid = itertools.product(norms or DEFAULT_NORMS, keyword_only or DEFAULT_KEYWORD_ONLY,
+                             [mode == "lazy" for mode in modes], thresholds)
+    try:
+        return [evaluate(fixtures, norm, kw_only, lazy, local_model, local_threshold, llm_seconds, llm_accuracy)
+                for norm, kw_only, lazy, local_threshold in grid]
+    finally:
+        _set_thresholds(*defaults)
+
+
+def pareto_front(rows: List[Dict]) -> List[Dict]:
+    """
+    Configurations no other one beats on accuracy without more LLM calls —
+    counted both in total (deferred ones included: the same quota pays) and
+    inline (what the run itself waits on) — or ties while making fewer.
+    """
+    def no_worse(o, row):
+        return (o["accuracy"] >= row["accuracy"] and o["total_rate"] <= row["total_rate"]
+                and o["llm_rate"] <= row["llm_rate"])
+
+    def dominated(row):
+        return any(no_worse(o, row) and not no_worse(row, o) for o in rows)
+    return [row for row in rows if not dominated(row)]
+
+
+def _is_default(row: Dict) -> bool:
+    return (row["norm"] == 0.3 and row["keyword_only"] == 0.6
+            and row["local_threshold"] in (None, LOCAL_MODEL_CONFIDENCE))
+
+
+def print_report(rows: List[Dict], fixtures: int, pareto_only: bool = False, simulated_tools: int = 0,
+                 llm_accuracy: float = LLM_ACCURACY):
+    """simulated_tools: fixtures without a recorded llm_category, answered by simulated_llm_category()."""
+    front = pareto_front(rows)
+    shown = front if pareto_only else rows
+    print(f"\n{'='*114}")
+    print(f"{fixtures} labelled tools, {len(rows)} configurations  (* = current defaults, P = Pareto-optimal)")
+    if simulated_tools:
+        print(f"NOTE: {simulated_tools}/{fixtures} tools have no recorded llm_category — accuracy assumes the LLM "
+              f"gets {llm_accuracy:.0%} of them right (record real answers with --live)")
+    print(f"{'-'*114}")
+    print(f"{'norm':>5}{'kw-only':>9}{'local':>7}{'mode':>7}{'accuracy':>10}{'LLM calls':>11}{'deferred':>10}"
+          f"{'total':>10}{'tokens':>9}{'cpu ms':>9}{'est run s':>11}{'est wall s':>12}")
+    for row in sorted(shown, key=lambda r: (r["total_rate"], -r["accuracy"])):
+        local = "-" if row["local_threshold"] is None else f"{row['local_threshold']:.2f}"
+        marks = ("*" if _is_default(row) else " ") + ("P" if row in front else " ")
+        print(f"{row['norm']:>5.2f}{row['keyword_only']:>9.2f}{local:>7}{'lazy' if row['lazy'] else 'eager':>7}"
+              f"{row['accuracy']:>10.1%}{row['llm_rate']:>11.1%}{row['deferred_rate']:>10.1%}{row['total_rate']:>10.1%}"
+              f"{row['tokens']:>9,}{row['cpu_seconds'] * 1000:>9.1f}{row['est_run_seconds']:>11.1f}"
+              f"{row['est_seconds']:>12.1f}  {marks}")
+    print(f"{'='*114}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Sweep classifier thresholds over a labelled fixture set")
+    parser.add_argument("--fixtures", default=FIXTURES_PATH)
+    parser.add_argument("--from-db", action="store_true", help="use the tools table's LLM-labelled rows instead")
+    parser.add_argument("--live", action="store_true", help="record real Groq answers first (one call per tool)")
+    parser.add_argument("--local-model", default=LOCAL_MODEL_PATH, help="local model to sweep (skipped if missing)")
+    parser.add_argument("--norms", type=float, nargs="+", default=DEFAULT_NORMS)
+    parser.add_argument("--keyword-only", type=float, nargs="+", default=DEFAULT_KEYWORD_ONLY)
+    parser.add_argument("--local-thresholds", type=float, nargs="+", default=DEFAULT_LOCAL_THRESHOLDS)
+    parser.add_argument("--modes", nargs="+", choices=["eager", "lazy"], default=["eager", "lazy"])
+    parser.add_argument("--llm-seconds", type=float, default=LLM_SECONDS, help="assumed Groq latency per call")
+    parser.add_argument("--llm-accuracy", type=float, default=LLM_ACCURACY,
+                        help="assumed LLM accuracy on tools without a recorded llm_category")
+    parser.add_argument("--pareto", action="store_true", help="only print Pareto-optimal configurations")
+    args = parser.parse_args()
+
+    fixtures = fixtures_from_db() if args.from_db else load_fixtures(args.fixtures)
+    llm_seconds = args.llm_seconds
+    if args.live:
+        llm_seconds = record_live_answers(fixtures)
+        print(f"Mean Groq latency: {llm_seconds:.2f}s")
+    local_model = load_model(args.local_model)
+
+    print(f"Benchmarking classifier: {len(fixtures)} tools, local model "
+          f"{'loaded' if local_model else 'not found — tier skipped'}, "
+          f"LLM {'recorded' if args.live else 'simulated'} at {llm_seconds:.2f}s/call")
+    rows = run_sweep(fixtures, args.norms, args.keyword_only, args.modes, local_model,
+                     args.local_thresholds, llm_seconds, args.llm_accuracy)
+    # --from-db gold labels are the LLM's own answers, so only fixture files need simulating
+    simulated_tools = 0 if args.from_db else sum(1 for f in fixtures if not f.get("llm_category"))
+    print_report(rows, len(fixtures), args.pareto, simulated_tools, args.llm_accuracy)
@@ -0,0 +1,113 @@
+"""
+bench_scraper.py - Offline scraper throughput benchmark (no live sites touched)
+Drives iter_all_sources() against mock_upstream.py and reports items/sec,
+p50/p99 wall time per source and peak Python heap.
+Run: python bench_scraper.py --runs 5 --spaces 2000 --latency-ms 50 --error-rate 0.01
+"""
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+import tracemalloc
+from typing import Dict, List
+
+import host_guard
+import http_cache
+import scraper
+from host_guard import HostGuard
+from mock_upstream import MockUpstream
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))]
+
+
+async def _one_run(workdir: str, run: int):
+    session = scraper.ScraperSession()
+    # Fresh limiter/breaker state per run — one open circuit must not skew the next run
+    session.guard = HostGuard(path=os.path.join(workdir, f"host_state_{run}.json"))
+    timings: List[Dict] = []
+    start = time.perf_counter()
+    # A record merged with a later duplicate is yielded again — count each once
+    unique = len(await scraper.collect_tools(scraper.iter_all_sources(session, timings=timings, archive_raw=False)))
+    wall = time.perf_counter() - start
+
+    await session.aclose()
+    return unique, wall, timings
+
+
+def run_benchmark(runs: int = 3, awesome: int = 500, spaces: int = 1000, taaft: int = 100,
+                  latency_ms: float = 50, error_rate: float = 0.0, warm_cache: bool = False) -> Dict:
+    workdir = tempfile.mkdtemp(prefix="bench_scraper_")
+    host_guard.HOST_RATE_LIMITS["127.0.0.1"] = (10_000, 10_000)   # measure the scraper, not the limiter
+
+    results = {"runs": [], "per_source": {}}
+    with MockUpstream(awesome_items=awesome, spaces=spaces, taaft_cards=taaft,
+                      latency_ms=latency_ms, error_rate=error_rate) as upstream:
+        scraper.AWESOME_LIST_URLS = [upstream.awesome_url]
+        scraper.HF_SPACES_API = upstream.spaces_api
+        scraper.TAAFT_URLS = [upstream.taaft_url]
+        scraper.GITHUB_LIMIT = awesome
+        scraper.HF_ITEM_BUDGET = spaces
+
+        tracemalloc.start()
+        for run in range(runs):
+            # Cold runs get an empty conditional-fetch cache; warm runs share one
+            http_cache.CACHE_DIR = os.path.join(workdir, "http_cache" if warm_cache else f"http_cache_{run}")
+            unique, wall, timings = asyncio.run(_one_run(workdir, run))
+            raw = sum(t["tools"] for t in timings)
+            results["runs"].append({"unique": unique, "raw": raw, "seconds": wall})
+            for t in timings:
+                results["per_source"].setdefault(t["source"], []).append(t)
+            print(f"  run {run + 1}/{runs}: {unique} unique / {raw} raw tools in {wall:.2f}s")
+        results["peak_mem_mb"] = tracemalloc.get_traced_memory()[1] / 1e6
+        tracemalloc.stop()
+
+    return results
+
+
+def print_report(results: Dict):
+    runs = results["runs"]
+    total_raw = sum(r["raw"] for r in runs)
+    total_secs = sum(r["seconds"] for r in runs)
+    walls = [r["seconds"] for r in runs]
+
+    print(f"\n{'='*64}")
+    print(f"Overall: {total_raw / max(total_secs, 1e-9):,.0f} items/sec  "
+          f"(wall p50 {_percentile(walls, 50):.2f}s, p99 {_percentile(walls, 99):.2f}s)")
+    print(f"Peak Python heap: {results['peak_mem_mb']:.1f} MB")
+    print(f"{'-'*64}")
+    print(f"{'Source':<26}{'items/s':>10}{'p50 s':>9}{'p99 s':>9}  status")
+    for source, timings in results["per_source"].items():
+        secs = [t["seconds"] for t in timings]
+        items = sum(t["tools"] for t in timings)
+        statuses = ",".join(sorted({t["status"] for t in timings}))
+        if statuses == "skipped":
+            # Never ran (e.g. TAAFT without Playwright) — nothing was measured
+            print(f"{source:<26}{'-':>10}{'-':>9}{'-':>9}  {statuses}")
+            continue
+        print(f"{source:<26}{items / max(sum(secs), 1e-9):>10,.0f}{_percentile(secs, 50):>9.2f}{_percentile(secs, 99):>9.2f}  {statuses}")
+    print(f"{'='*64}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark scrapers against a local mock upstream")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--awesome", type=int, default=500, help="awesome-list items")
+    parser.add_argument("--spaces", type=int, default=1000, help="HF spaces")
+    parser.add_argument("--taaft", type=int, default=100, help="TAAFT cards")
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--warm", action="store_true", help="reuse the conditional-fetch cache across runs")
+    args = parser.parse_args()
+
+    print(f"Benchmarking scrapers: {args.runs} runs, {args.awesome} awesome items, "
+          f"{args.spaces} spaces, {args.taaft} TAAFT cards, {args.latency_ms}ms latency, "
+          f"{args.error_rate:.0%} errors")
+    print_report(run_benchmark(args.runs, args.awesome, args.spaces, args.taaft,
+                               args.latency_ms, args.error_rate, args.warm))
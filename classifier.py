@@ -3,29 +3,28 @@ classifier.py - Hybrid keyword + LLM classification
 Keyword rules run first (fast/free), LLM only for uncertain cases
 """
 
-from typing import Dict, Tuple
-
-# ── Keyword rules per category ────────────────────────────────────────────────
-KEYWORD_RULES: Dict[str, list] = {
-    "Code Generation":      ["code", "coding", "programming", "developer", "github", "copilot",
-                              "IDE", "autocomplete", "refactor", "debugging", "python", "javascript"],
-    "Image Generation":     ["image", "photo", "art", "picture", "illustration", "stable diffusion",
-                              "dall-e", "midjourney", "text-to-image", "artwork", "visual", "generate image"],
-    "Video Generation":     ["video", "animation", "movie", "film", "cinematic", "text-to-video",
-                              "runway", "sora", "clip", "render"],
-    "Audio & Speech":       ["audio", "voice", "speech", "tts", "transcription", "podcast",
-                              "music", "sound", "whisper", "elevenlabs", "clone voice"],
-    "Data Analysis":        ["data", "analytics", "dashboard", "chart", "sql", "csv", "excel",
-                              "visualization", "bi", "insights", "statistics", "tableau"],
-    "Writing & Content":    ["write", "writing", "blog", "seo", "copywriting", "content",
-                              "essay", "article", "marketing copy", "social media", "jasper"],
-    "Automation & Agents":  ["automate", "automation", "workflow", "agent", "pipeline",
-                              "zapier", "n8n", "task", "autonomous", "schedule", "bot"],
-    "Search & Research":    ["search", "research", "browse", "web", "real-time", "citation",
-                              "knowledge", "perplexity", "question answering", "fact"],
-    "Chatbot & Assistant":  ["chat", "chatbot", "assistant", "conversation", "customer service",
-                              "support", "dialogue", "gpt", "claude", "gemini"],
-}
+import hashlib
+import json
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from keyword_index import matcher
+from local_model import LOCAL_MODEL_CONFIDENCE
+
+# At/above this keyword confidence the keyword category wins over the LLM's anyway
+KEYWORD_ONLY_CONFIDENCE = 0.6
+# Confidence = keyword hits / (this fraction of the category's keywords), capped at 1
+KEYWORD_CONFIDENCE_NORM = 0.3
+# Per-tool category score vector: the k best keyword categories (see keyword_classify_batch)
+TOP_K_CATEGORIES = 3
+# A second category scoring at least this is real keyword support, not noise
+SECONDARY_MIN_SCORE = 0.3
+
+
+def keyword_scores(text: str) -> Dict[str, int]:
+    """Number of distinct keywords of each category found in text."""
+    return matcher("classify").scores(text)
 
 
 def keyword_classify(text: str) -> Tuple[str, float]:
@@ -33,18 +32,14 @@ def keyword_classify(text: str) -> Tuple[str, float]:
     Score text against keyword rules.
     Returns (best_category, confidence_0_to_1)
     """
-    text_lower = text.lower()
-    scores = {}
-
-    for category, keywords in KEYWORD_RULES.items():
-        matched = sum(1 for kw in keywords if kw.lower() in text_lower)
-        scores[category] = matched
+    rules = matcher("classify")
+    scores = rules.scores(text)
 
     best_cat = max(scores, key=scores.get)
     best_score = scores[best_cat]
 
-    total_possible = len(KEYWORD_RULES[best_cat])
-    confidence = min(best_score / max(total_possible * 0.3, 1), 1.0)
+    total_possible = len(rules.rules[best_cat])
+    confidence = min(best_score / max(total_possible * KEYWORD_CONFIDENCE_NORM, 1), 1.0)
 
     if best_score == 0:
         return "Other", 0.0
@@ -52,45 +47,224 @@ def keyword_classify(text: str) -> Tuple[str, float]:
     return best_cat, round(confidence, 2)
 
 
-def hybrid_classify(name: str, description: str, llm_fn=None) -> Dict:
+def keyword_classify_batch(texts: List[str], k: int = TOP_K_CATEGORIES) -> Tuple[np.ndarray, np.ndarray, List[Dict[str, float]]]:
     """
-    Hybrid classification:
-    - High keyword confidence → use keyword result, skip LLM call (saves quota)
-    - Low confidence → call LLM for accurate classification + full enrichment
+    keyword_classify() for many texts at once, plus each text's top-k categories.
+    Returns (labels, confidences, category_scores): labels/confidences have
+    one entry per text; category_scores[i] maps text i's k best categories
+    (those with any keyword hit) to their confidence, best first.
     """
-    combined_text = f"{name} {description}"
-    keyword_cat, confidence = keyword_classify(combined_text)
+    rules = matcher("classify")
+    scores = rules.score_matrix(texts)
+    all_confidences = np.round(np.minimum(scores / np.maximum(rules.sizes * KEYWORD_CONFIDENCE_NORM, 1), 1.0), 2)
 
-    # High confidence: keyword is reliable, still enrich with LLM
-    if confidence >= 0.4 and llm_fn:
-        llm_result = llm_fn(name, description)
-        # Override LLM category with keyword result if confidence is high
-        if confidence >= 0.6:
-            llm_result["category"] = keyword_cat
-        llm_result["classification_method"] = "hybrid"
-        llm_result["keyword_confidence"] = confidence
-        return llm_result
+    best = scores.argmax(axis=1)                  # first category wins ties, like keyword_classify
+    best_score = scores[np.arange(len(texts)), best]
+    confidences = all_confidences[np.arange(len(texts)), best]
+    labels = np.array(rules.categories, dtype=object)[best]
+    labels[best_score == 0] = "Other"
+    confidences[best_score == 0] = 0.0
 
-    # Medium/low confidence: let LLM decide everything
-    if llm_fn:
-        llm_result = llm_fn(name, description)
-        llm_result["classification_method"] = "llm"
-        llm_result["keyword_confidence"] = confidence
-        return llm_result
+    top = np.argsort(-scores, axis=1, kind="stable")[:, :k]
+    category_scores = [
+        {rules.categories[ci]: float(all_confidences[row, ci]) for ci in top[row] if scores[row, ci]}
+        for row in range(len(texts))
+    ]
+    return labels, confidences, category_scores
 
-    # No LLM available: keyword only
+
+def keyword_category_scores(text: str, k: int = TOP_K_CATEGORIES) -> Dict[str, float]:
+    """The top-k {category: confidence} of one text (see keyword_classify_batch)."""
+    return keyword_classify_batch([text], k)[2][0]
+
+
+def _straddles(category_scores: Dict[str, float]) -> bool:
+    """Two categories with real keyword support that together are as sure as one confident category."""
+    top = list(category_scores.values())[:2]
+    return len(top) == 2 and top[1] >= SECONDARY_MIN_SCORE and sum(top) >= KEYWORD_ONLY_CONFIDENCE
+
+
+def is_llm_labelled(tool: Dict, category_only: bool = False, keyword_only_confidence: float = None) -> bool:
+    """
+    Whether a classified tool's labels came from a successful Groq call — the
+    one test behind the classification cache, label transfer sources and the
+    local model's training data. "Other" is also what a failed call returns,
+    so it never counts. category_only=True further requires the category
+    itself to be the LLM's: hybrid results at/above keyword_only_confidence
+    (default KEYWORD_ONLY_CONFIDENCE) carry the keyword category instead.
+    """
+    if (tool.get("category") in (None, "Other") or tool.get("enrichment_status") == "pending"
+            or tool.get("llm_failed")):
+        return False
+    method = tool.get("classification_method")
+    if category_only:
+        threshold = KEYWORD_ONLY_CONFIDENCE if keyword_only_confidence is None else keyword_only_confidence
+        return method == "llm" or (method == "hybrid" and (tool.get("keyword_confidence") or 0) < threshold)
+    # Lazily enriched rows: keyword/local category, LLM summary/tags/etc.
+    return method in ("llm", "hybrid") or tool.get("enrichment_status") == "done"
+
+
+def classification_text(name: str, description: str, category_hint: str = None) -> str:
+    """The text keyword rules are scored against."""
+    return f"{name} {description} {category_hint or ''}"
+
+
+# Part of every classification cache key (see classification_cache_key): editing
+# the "classify" keyword rules invalidates cached results by itself; bump
+# CLASSIFIER_REVISION when hybrid_classify() or the LLM prompt changes in a way that should too.
+CLASSIFIER_REVISION = 2
+
+
+def classifier_version() -> str:
+    return f"{CLASSIFIER_REVISION}-{matcher('classify').version}"
+
+
+def classification_cache_key(name: str, description: str, category_hint: str = None) -> str:
+    payload = json.dumps([classifier_version(), name, description, category_hint or ""])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _keyword_only_result(category: str, description: str, confidence: float, method: str) -> Dict:
     return {
-        "category": keyword_cat,
+        "category": category,
         "best_for_tasks": [],
         "summary": description[:200],
         "audience_fit": {},
         "tags": [],
         "pricing_hint": "Unknown",
-        "classification_method": "keyword_only",
+        "classification_method": method,
         "keyword_confidence": confidence,
     }
 
 
+def classify_without_llm(name: str, description: str, keyword_result: Tuple[str, float], text: str = None,
+                         lazy_enrichment: bool = False, local_fn=None, neighbour_fn=None,
+                         llm_available: bool = True, category_scores: Dict[str, float] = None) -> Optional[Dict]:
+    """
+    The tiers of hybrid_classify() that never wait on Groq.
+    Returns their result, or None when the LLM has to decide.
+    """
+    result = _classify_without_llm(name, description, keyword_result, text, lazy_enrichment, local_fn,
+                                   neighbour_fn, llm_available, category_scores or {})
+    if result is not None:
+        result["category_scores"] = category_scores or {}
+    return result
+
+
+def _classify_without_llm(name, description, keyword_result, text, lazy_enrichment, local_fn, neighbour_fn,
+                          llm_available, category_scores) -> Optional[Dict]:
+    keyword_cat, confidence = keyword_result
+
+    # Near-identical to a tool the LLM already enriched: copy its labels
+    # (neighbour_fn, e.g. label_transfer.NeighbourIndex.transfer)
+    if neighbour_fn:
+        neighbour = neighbour_fn(name, description)
+        if neighbour is not None:
+            result = {k: v for k, v in neighbour.items() if k != "similarity"}
+            result["classification_method"] = "neighbour"
+            result["keyword_confidence"] = confidence
+            result["model_confidence"] = neighbour["similarity"]
+            return result
+
+    # Very high confidence + lazy mode: don't wait on the LLM at all. The tool
+    # gets its keyword category now and enrichment_status="pending"; summary,
+    # tags, audience_fit and pricing come later (pipeline.enrich_pending_tools)
+    if lazy_enrichment and llm_available and confidence >= KEYWORD_ONLY_CONFIDENCE:
+        result = _keyword_only_result(keyword_cat, description, confidence, "keyword_confident")
+        result["enrichment_status"] = "pending"
+        return result
+
+    # Confidently multi-label (two categories with solid keyword support) + lazy mode:
+    # queue it too — the deferred LLM enrichment picks which of them is primary
+    if lazy_enrichment and llm_available and _straddles(category_scores):
+        result = _keyword_only_result(keyword_cat, description, confidence, "keyword_multi")
+        result["enrichment_status"] = "pending"
+        return result
+
+    # Mid/low keyword confidence: a local model at least LOCAL_MODEL_CONFIDENCE
+    # sure (local_fn, e.g. local_model.LocalModel.predict) beats a Groq round
+    # trip; its result is queued for lazy enrichment like the keyword tiers
+    if local_fn and confidence < KEYWORD_ONLY_CONFIDENCE:
+        local_cat, local_confidence = local_fn(text or classification_text(name, description))
+        if local_confidence >= LOCAL_MODEL_CONFIDENCE:
+            result = _keyword_only_result(local_cat, description, confidence, "local_model")
+            result["model_confidence"] = local_confidence
+            if llm_available:
+                result["enrichment_status"] = "pending"
+            return result
+
+    # No LLM available: keyword only
+    if not llm_available:
+        return _keyword_only_result(keyword_cat, description, confidence, "keyword_only")
+    return None
+
+
+def hybrid_classify(name: str, description: str, llm_fn=None, category_hint: str = None,
+                    keyword_result: Tuple[str, float] = None, lazy_enrichment: bool = False,
+                    local_fn=None, neighbour_fn=None, category_scores: Dict[str, float] = None) -> Dict:
+    """
+    Hybrid classification, cheapest tier first: label transfer from a
+    near-identical enriched tool → keyword rules → local model → LLM.
+    category_hint is scored along with the text; keyword_result and
+    category_scores can be passed in from keyword_classify_batch().
+    """
+    text, keyword_result, category_scores = _keyword_inputs(name, description, category_hint,
+                                                            keyword_result, category_scores)
+    result = classify_without_llm(name, description, keyword_result, text, lazy_enrichment, local_fn,
+                                  neighbour_fn, llm_available=llm_fn is not None, category_scores=category_scores)
+    if result is not None:
+        return result
+    return apply_llm_result(llm_fn(name, description), keyword_result, category_scores)
+
+
+async def hybrid_classify_async(name: str, description: str, llm_fn=None, category_hint: str = None,
+                                keyword_result: Tuple[str, float] = None, lazy_enrichment: bool = False,
+                                local_fn=None, neighbour_fn=None, category_scores: Dict[str, float] = None) -> Dict:
+    """hybrid_classify() with an async llm_fn (e.g. llm_async.AsyncGroqEngine.classify_and_enrich)."""
+    text, keyword_result, category_scores = _keyword_inputs(name, description, category_hint,
+                                                            keyword_result, category_scores)
+    result = classify_without_llm(name, description, keyword_result, text, lazy_enrichment, local_fn,
+                                  neighbour_fn, llm_available=llm_fn is not None, category_scores=category_scores)
+    if result is not None:
+        return result
+    return apply_llm_result(await llm_fn(name, description), keyword_result, category_scores)
+
+
+def _keyword_inputs(name, description, category_hint, keyword_result, category_scores):
+    text = classification_text(name, description, category_hint)
+    if keyword_result is None:
+        keyword_result = keyword_classify(text)
+    if category_scores is None:
+        category_scores = keyword_category_scores(text)
+    return text, keyword_result, category_scores
+
+
+def apply_llm_result(llm_result: Dict, keyword_result: Tuple[str, float], category_scores: Dict[str, float]) -> Dict:
+    """
+    Combine an LLM enrichment with the keyword result. A failed call
+    (llm_failed) falls back to the keyword category and is queued for
+    enrichment like a lazy result, so it is retried rather than kept.
+    """
+    keyword_cat, confidence = keyword_result
+
+    if llm_result.get("llm_failed"):
+        llm_result["category"] = keyword_cat
+        llm_result["classification_method"] = "keyword_fallback"
+        llm_result["enrichment_status"] = "pending"
+    elif confidence >= 0.4:
+        # High confidence: keyword is reliable, LLM still enriches.
+        # Override LLM category with keyword result if confidence is high
+        if confidence >= KEYWORD_ONLY_CONFIDENCE:
+            llm_result["category"] = keyword_cat
+        llm_result["classification_method"] = "hybrid"
+    else:
+        # Medium/low confidence: let LLM decide everything
+        llm_result["classification_method"] = "llm"
+    llm_result["keyword_confidence"] = confidence
+    llm_result["category_scores"] = category_scores
+    return llm_result
+
+
 if __name__ == "__main__":
     # Test without LLM
     result = hybrid_classify(
@@ -5,6 +5,7 @@ Simple, zero-setup, production-ready for small/medium datasets
 
 import sqlite3
 import json
+import time
 from datetime import datetime
 from typing import List, Dict, Optional
 
@@ -33,10 +34,35 @@ def init_db():
             pricing_hint    TEXT,
             classification_method TEXT,
             keyword_confidence REAL,
+            model_confidence REAL,  -- local_model probability / neighbour similarity, when that tier decided
+            label_source    TEXT,  -- name of the tool the labels were copied from (classification_method = 'neighbour')
             source          TEXT,
-            scraped_at      TEXT
+            category_hint   TEXT,  -- list section + homepage keywords, scored with the text
+            classifier_version TEXT,  -- classifier.classifier_version() that produced the labels
+            scraped_at      TEXT,
+            enrichment_status TEXT,  -- 'pending' = summary/tags/etc. still to come from the LLM
+            category_scores TEXT  -- JSON object: top-k keyword categories → confidence, best first
         );
 
+        -- Primary + secondary categories per tool, for indexed multi-label lookups
+        CREATE TABLE IF NOT EXISTS tool_categories (
+            tool_id     INTEGER NOT NULL,
+            category    TEXT NOT NULL,
+            score       REAL,     -- keyword confidence for the category
+            is_primary  INTEGER,  -- 1 = the tool's category column
+            PRIMARY KEY (tool_id, category)
+        );
+        CREATE INDEX IF NOT EXISTS idx_tool_categories_category ON tool_categories (category, score);
+
+        CREATE TABLE IF NOT EXISTS classification_cache (
+            key         TEXT PRIMARY KEY,  -- sha256(classifier version, name, description, hint)
+            version     TEXT,
+            result      TEXT,  -- JSON: hybrid_classify() output
+            created_at  REAL,
+            last_used   REAL
+        );
+        CREATE INDEX IF NOT EXISTS idx_cache_last_used ON classification_cache (last_used);
+
         CREATE TABLE IF NOT EXISTS pipeline_runs (
             id          INTEGER PRIMARY KEY AUTOINCREMENT,
             run_at      TEXT,
@@ -44,20 +70,44 @@ def init_db():
             status      TEXT
         );
     """)
+    _add_missing_columns(conn, "tools", {
+        "enrichment_status": "TEXT",
+        "model_confidence": "REAL",
+        "label_source": "TEXT",
+        "category_scores": "TEXT",
+        "category_hint": "TEXT",
+        "classifier_version": "TEXT",
+    })
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_tools_enrichment ON tools (enrichment_status)")
+    # Rows saved before tool_categories existed: index at least their primary category
+    conn.execute("""
+        INSERT OR IGNORE INTO tool_categories (tool_id, category, score, is_primary)
+        SELECT id, category, NULL, 1 FROM tools
+        WHERE category IS NOT NULL AND id NOT IN (SELECT tool_id FROM tool_categories)
+    """)
     conn.commit()
     conn.close()
     print("[DB] Initialized database")
 
 
+def _add_missing_columns(conn, table: str, columns: Dict[str, str]):
+    """Bring databases created by older versions up to the current schema."""
+    existing = {row["name"] for row in conn.execute(f"PRAGMA table_info({table})")}
+    for name, decl in columns.items():
+        if name not in existing:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN {name} {decl}")
+
+
 def save_tool(tool: Dict):
     """Insert or update a tool record."""
     conn = get_conn()
-    conn.execute("""
+    cursor = conn.execute("""
         INSERT INTO tools (
             name, description, category, summary,
             best_for_tasks, audience_fit, tags, pricing_hint,
-            classification_method, keyword_confidence, source, scraped_at
-        ) VALUES (?,?,?,?,?,?,?,?,?,?,?,?)
+            classification_method, keyword_confidence, model_confidence, label_source,
+            source, category_hint, classifier_version, scraped_at, enrichment_status, category_scores
+        ) VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?,?)
     """, (
         tool.get("name"),
         tool.get("description"),
@@ -69,22 +119,56 @@ def save_tool(tool: Dict):
         tool.get("pricing_hint"),
         tool.get("classification_method"),
         tool.get("keyword_confidence"),
+        tool.get("model_confidence"),
+        tool.get("label_source"),
         tool.get("source"),
+        tool.get("category_hint"),
+        tool.get("classifier_version"),
         datetime.now().isoformat(),
+        tool.get("enrichment_status"),
+        json.dumps(tool.get("category_scores") or {}),
     ))
+    _save_tool_categories(conn, cursor.lastrowid, tool.get("category"), tool.get("category_scores") or {})
     conn.commit()
     conn.close()
 
 
-def get_all_tools(category: str = None, search: str = None) -> List[Dict]:
-    """Fetch tools with optional filters."""
+def _save_tool_categories(conn, tool_id: int, category: Optional[str], category_scores: Dict[str, float]):
+    rows = [(tool_id, cat, score, int(cat == category)) for cat, score in category_scores.items()]
+    if category and category not in category_scores:
+        rows.append((tool_id, category, None, 1))
+    conn.executemany(
+        "INSERT OR REPLACE INTO tool_categories (tool_id, category, score, is_primary) VALUES (?,?,?,?)", rows
+    )
+
+
+def _row_to_tool(row) -> Dict:
+    t = dict(row)
+    t["best_for_tasks"] = json.loads(t.get("best_for_tasks") or "[]")
+    t["audience_fit"] = json.loads(t.get("audience_fit") or "{}")
+    t["tags"] = json.loads(t.get("tags") or "[]")
+    t["category_scores"] = json.loads(t.get("category_scores") or "{}")
+    return t
+
+
+def get_all_tools(category: str = None, search: str = None, include_secondary: bool = False,
+                  min_score: float = 0.0) -> List[Dict]:
+    """
+    Fetch tools with optional filters. include_secondary also matches tools
+    whose secondary categories include `category` with at least min_score.
+    """
     conn = get_conn()
     query = "SELECT * FROM tools WHERE 1=1"
     params = []
 
     if category and category != "All":
-        query += " AND category = ?"
-        params.append(category)
+        if include_secondary:
+            query += """ AND id IN (SELECT tool_id FROM tool_categories
+                                    WHERE category = ? AND (is_primary = 1 OR score >= ?))"""
+            params.extend([category, min_score])
+        else:
+            query += " AND category = ?"
+            params.append(category)
 
     if search:
         query += " AND (name LIKE ? OR summary LIKE ? OR description LIKE ?)"
@@ -95,23 +179,89 @@ def get_all_tools(category: str = None, search: str = None) -> List[Dict]:
     rows = conn.execute(query, params).fetchall()
     conn.close()
 
-    tools = []
-    for row in rows:
-        t = dict(row)
-        t["best_for_tasks"] = json.loads(t.get("best_for_tasks") or "[]")
-        t["audience_fit"] = json.loads(t.get("audience_fit") or "{}")
-        t["tags"] = json.loads(t.get("tags") or "[]")
-        tools.append(t)
+    return [_row_to_tool(row) for row in rows]
 
-    return tools
+
+def get_tool(tool_id: int) -> Optional[Dict]:
+    conn = get_conn()
+    row = conn.execute("SELECT * FROM tools WHERE id = ?", (tool_id,)).fetchone()
+    conn.close()
+    return _row_to_tool(row) if row else None
+
+
+def get_llm_labelled_tools(keyword_only_confidence: float = None) -> List[Dict]:
+    """
+    Tools whose category came from the LLM — training data for local_model
+    (classifier.is_llm_labelled with category_only=True; keyword_only_confidence
+    defaults to the classifier's current KEYWORD_ONLY_CONFIDENCE).
+    """
+    from classifier import is_llm_labelled
+    conn = get_conn()
+    rows = conn.execute("""
+        SELECT name, description, category_hint, category, classification_method, keyword_confidence,
+               enrichment_status
+        FROM tools WHERE classification_method IN ('llm', 'hybrid')
+    """).fetchall()
+    conn.close()
+    return [dict(row) for row in rows
+            if is_llm_labelled(dict(row), category_only=True, keyword_only_confidence=keyword_only_confidence)]
 
 
-def get_category_stats() -> Dict:
-    """Return count per category for charts."""
+def get_pending_enrichment(limit: int = None) -> List[Dict]:
+    """Tools classified by keywords alone whose LLM enrichment is still queued."""
     conn = get_conn()
-    rows = conn.execute(
-        "SELECT category, COUNT(*) as count FROM tools GROUP BY category ORDER BY count DESC"
-    ).fetchall()
+    query = "SELECT * FROM tools WHERE enrichment_status = 'pending' ORDER BY id"
+    if limit:
+        query += f" LIMIT {int(limit)}"
+    rows = conn.execute(query).fetchall()
+    conn.close()
+    return [_row_to_tool(row) for row in rows]
+
+
+def update_tool_enrichment(tool_id: int, enrichment: Dict, category: str = None, method: str = None):
+    """
+    Fill in the LLM enrichment fields of a tool. Its category is left alone
+    unless a new primary category is given; its classification_method unless
+    a method is (a keyword fallback becoming an LLM/hybrid result).
+    """
+    conn = get_conn()
+    if category:
+        conn.execute("UPDATE tools SET category = ? WHERE id = ?", (category, tool_id))
+        conn.execute("UPDATE tool_categories SET is_primary = (category = ?) WHERE tool_id = ?", (category, tool_id))
+        conn.execute("INSERT OR IGNORE INTO tool_categories (tool_id, category, score, is_primary) VALUES (?,?,NULL,1)",
+                     (tool_id, category))
+    if method:
+        conn.execute("UPDATE tools SET classification_method = ? WHERE id = ?", (method, tool_id))
+    conn.execute("""
+        UPDATE tools SET
+            summary = ?, best_for_tasks = ?, audience_fit = ?, tags = ?,
+            pricing_hint = ?, enrichment_status = 'done'
+        WHERE id = ?
+    """, (
+        enrichment.get("summary"),
+        json.dumps(enrichment.get("best_for_tasks", [])),
+        json.dumps(enrichment.get("audience_fit", {})),
+        json.dumps(enrichment.get("tags", [])),
+        enrichment.get("pricing_hint"),
+        tool_id,
+    ))
+    conn.commit()
+    conn.close()
+
+
+def get_category_stats(include_secondary: bool = False, min_score: float = 0.0) -> Dict:
+    """Return count per category for charts (optionally counting secondary categories too)."""
+    conn = get_conn()
+    if include_secondary:
+        rows = conn.execute("""
+            SELECT category, COUNT(*) as count FROM tool_categories
+            WHERE is_primary = 1 OR score >= ?
+            GROUP BY category ORDER BY count DESC
+        """, (min_score,)).fetchall()
+    else:
+        rows = conn.execute(
+            "SELECT category, COUNT(*) as count FROM tools GROUP BY category ORDER BY count DESC"
+        ).fetchall()
     conn.close()
     return {row["category"]: row["count"] for row in rows}
 
@@ -120,8 +270,67 @@ def clear_tools():
     """Clear all tool records (for fresh pipeline run)."""
     conn = get_conn()
     conn.execute("DELETE FROM tools")
+    conn.execute("DELETE FROM tool_categories")
+    conn.commit()
+    conn.close()
+
+
+def delete_tools(names: List[str]):
+    """Remove tool records by name (incremental runs: changed + tombstoned tools)."""
+    conn = get_conn()
+    conn.executemany("DELETE FROM tool_categories WHERE tool_id IN (SELECT id FROM tools WHERE name = ?)",
+                     [(n,) for n in names])
+    conn.executemany("DELETE FROM tools WHERE name = ?", [(n,) for n in names])
+    conn.commit()
+    conn.close()
+
+
+def get_cached_classifications(keys: List[str], ttl_seconds: float) -> Dict[str, Dict]:
+    """Cached results for the keys that have one younger than ttl_seconds; marks them used."""
+    if not keys:
+        return {}
+    now = time.time()
+    conn = get_conn()
+    found = {}
+    for start in range(0, len(keys), 500):   # stay under SQLite's bound-parameter limit
+        chunk = keys[start:start + 500]
+        rows = conn.execute(
+            f"SELECT key, result FROM classification_cache WHERE created_at >= ? AND key IN ({','.join('?' * len(chunk))})",
+            [now - ttl_seconds, *chunk],
+        ).fetchall()
+        found.update({row["key"]: json.loads(row["result"]) for row in rows})
+    conn.executemany("UPDATE classification_cache SET last_used = ? WHERE key = ?", [(now, k) for k in found])
+    conn.commit()
+    conn.close()
+    return found
+
+
+def put_cached_classification(key: str, version: str, result: Dict):
+    now = time.time()
+    conn = get_conn()
+    conn.execute(
+        "INSERT OR REPLACE INTO classification_cache (key, version, result, created_at, last_used) VALUES (?,?,?,?,?)",
+        (key, version, json.dumps(result), now, now),
+    )
+    conn.commit()
+    conn.close()
+
+
+def prune_classification_cache(version: str, ttl_seconds: float, max_entries: int) -> int:
+    """Drop entries from other classifier versions, expired ones, then least recently used beyond max_entries."""
+    conn = get_conn()
+    removed = conn.execute(
+        "DELETE FROM classification_cache WHERE version != ? OR created_at < ?",
+        (version, time.time() - ttl_seconds),
+    ).rowcount
+    removed += conn.execute("""
+        DELETE FROM classification_cache WHERE key IN (
+            SELECT key FROM classification_cache ORDER BY last_used DESC LIMIT -1 OFFSET ?
+        )
+    """, (max_entries,)).rowcount
     conn.commit()
     conn.close()
+    return removed
 
 
 def log_run(tools_found: int, status: str = "success"):
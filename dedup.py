@@ -0,0 +1,171 @@
+"""
+dedup.py - Near-duplicate detection across scraper sources
+Normalized-name index + MinHash/LSH over descriptions, so "Stable Diffusion",
+"Stable-Diffusion Web UI" and "Stable Diffusion Webui" collapse into one merged tool
+(and one LLM classification). Each add() is O(1) amortized — linear overall.
+"""
+
+import hashlib
+import random
+import re
+from typing import Dict, List, Optional
+
+# Tokens that decorate a name without changing which tool it is
+NAME_NOISE_TOKENS = {"ai", "app", "demo", "ui", "webui", "web", "space", "official", "online", "the", "io"}
+
+# Descriptions the scrapers make up themselves — identical text, different tools
+GENERATED_DESC_PREFIXES = ("ai tool on hugging face", "ai tool hosted on hugging face")
+
+# Which record of a near-duplicate group survives, best first (tool["source"]):
+# curated list entries have a real homepage link and a section hint
+SOURCE_PRIORITY = ("GitHub Awesome AI Tools", "Hugging Face Spaces", "There's An AI For That", "Sample")
+# Filled in from the other record when the survivor lacks them
+MERGE_FIELDS = ("url", "category_hint", "last_modified")
+
+NUM_PERM = 64
+LSH_BANDS = 16                 # 16 bands x 4 rows → candidates from ~0.5 Jaccard
+LSH_ROWS = NUM_PERM // LSH_BANDS
+NEAR_DUP_THRESHOLD = 0.8       # estimated Jaccard needed to call it a duplicate
+MIN_SHINGLES = 4               # too-short descriptions aren't compared
+
+# Each "permutation" is an XOR mask over a 64-bit shingle hash — a bijection,
+# so min() over it is a valid MinHash and ~4x cheaper than (a*x + b) mod p.
+_rng = random.Random(1729)     # fixed seed → stable signatures across runs
+_MASKS = [_rng.getrandbits(64) for _ in range(NUM_PERM)]
+
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_name(name: str) -> str:
+    """'Stable-Diffusion Web UI' → 'stablediffusion'."""
+    tokens = [t for t in _NON_ALNUM_RE.split(name.lower()) if t]
+    core = [t for t in tokens if t not in NAME_NOISE_TOKENS]
+    return "".join(core or tokens)
+
+
+def _shingles(text: str) -> set:
+    words = [w for w in _NON_ALNUM_RE.split(text.lower()) if w]
+    if len(words) < 3:
+        return set(words)
+    return {" ".join(words[i:i + 3]) for i in range(len(words) - 2)}
+
+
+def minhash(text: str) -> Optional[List[int]]:
+    """MinHash signature of a description's word 3-grams, or None if too short."""
+    shingles = _shingles(text)
+    if len(shingles) < MIN_SHINGLES:
+        return None
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big") for s in shingles]
+    return [min([h ^ mask for h in hashes]) for mask in _MASKS]
+
+
+def _similarity(sig_a: List[int], sig_b: List[int]) -> float:
+    return sum(1 for x, y in zip(sig_a, sig_b) if x == y) / NUM_PERM
+
+
+def _source_rank(tool: Dict) -> int:
+    source = tool.get("source")
+    return SOURCE_PRIORITY.index(source) if source in SOURCE_PRIORITY else len(SOURCE_PRIORITY)
+
+
+def _real_description(tool: Dict) -> str:
+    desc = tool.get("description") or ""
+    return "" if desc.lower().startswith(GENERATED_DESC_PREFIXES) else desc
+
+
+def merge_into(kept: Dict, dup: Dict) -> bool:
+    """
+    Fold a near-duplicate into the indexed record, in place (the index keeps
+    pointing at it). The record from the higher-priority source survives
+    whichever arrived first; fields it lacks are taken from the other, and
+    the longer real description wins. Returns True if dup's record survived.
+    """
+    dup_wins = _source_rank(dup) < _source_rank(kept)
+    survivor, other = (dict(dup), kept) if dup_wins else (dict(kept), dup)
+    for field in MERGE_FIELDS:
+        if not survivor.get(field) and other.get(field):
+            survivor[field] = other[field]
+    if len(_real_description(other)) > len(_real_description(survivor)):
+        survivor["description"] = other["description"]
+    kept.clear()
+    kept.update(survivor)
+    return dup_wins
+
+
+class NearDuplicateIndex:
+    """
+    Streaming dedup state. add(tool) returns the already-indexed tool it
+    duplicates, or None after indexing it as a new tool.
+    """
+
+    def __init__(self, threshold: float = NEAR_DUP_THRESHOLD):
+        self.threshold = threshold
+        self._by_name: Dict[str, Dict] = {}
+        self._buckets: Dict[tuple, List[int]] = {}
+        self._tools: List[Dict] = []
+        self._signatures: List[List[int]] = []
+        self.merged = 0
+
+    def _desc_signature(self, tool: Dict) -> Optional[List[int]]:
+        desc = tool.get("description", "")
+        if desc.lower().startswith(GENERATED_DESC_PREFIXES):
+            return None
+        return minhash(desc)
+
+    def find(self, tool: Dict) -> Optional[Dict]:
+        """Return the indexed tool this one duplicates, if any."""
+        match = self._by_name.get(normalize_name(tool["name"]))
+        if match is not None:
+            return match
+
+        sig = self._desc_signature(tool)
+        if sig is None:
+            return None
+        for band in range(LSH_BANDS):
+            key = (band, tuple(sig[band * LSH_ROWS:(band + 1) * LSH_ROWS]))
+            for idx in self._buckets.get(key, ()):
+                if _similarity(sig, self._signatures[idx]) >= self.threshold:
+                    return self._tools[idx]
+        return None
+
+    def add(self, tool: Dict) -> Optional[Dict]:
+        match = self.find(tool)
+        if match is not None:
+            self.merged += 1
+            return match
+
+        self._by_name[normalize_name(tool["name"])] = tool
+        sig = self._desc_signature(tool)
+        if sig is not None:
+            idx = len(self._tools)
+            self._tools.append(tool)
+            self._signatures.append(sig)
+            for band in range(LSH_BANDS):
+                key = (band, tuple(sig[band * LSH_ROWS:(band + 1) * LSH_ROWS]))
+                self._buckets.setdefault(key, []).append(idx)
+        return None
+
+
+def dedupe(tools: List[Dict]) -> List[Dict]:
+    """One merged record per group of near-duplicates (see merge_into), in first-seen order."""
+    index = NearDuplicateIndex()
+    kept = []
+    for tool in map(dict, tools):
+        match = index.add(tool)
+        if match is None:
+            kept.append(tool)
+        else:
+            merge_into(match, tool)
+    return kept
+
+
+if __name__ == "__main__":
+    sample = [
+        {"name": "Stable Diffusion", "description": "Open-source text-to-image AI model that generates detailed images from text descriptions locally."},
+        {"name": "Stable-Diffusion Web UI", "description": "Browser interface for Stable Diffusion."},
+        {"name": "Stable Diffusion Webui", "description": "AI tool on Hugging Face. Tags: gradio"},
+        {"name": "SD Local", "description": "Open-source text-to-image AI model that generates detailed images from text descriptions locally!"},
+        {"name": "Whisper", "description": "OpenAI open-source speech-to-text transcription model with multilingual support and high accuracy."},
+    ]
+    for t in dedupe(sample):
+        print(f"  - {t['name']}: {t['description'][:60]}")
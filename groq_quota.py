@@ -0,0 +1,130 @@
+"""
+groq_quota.py - The one Groq requests/min + tokens/min budget for this process
+Every call — AsyncGroqEngine's on any event loop, and llm_engine's blocking
+_call_groq() / generate_trend_summary() from the pipeline, dashboard or
+scheduler threads — reserves its estimated tokens (prompt size + max_tokens)
+against QUOTA before it goes out, and settles the reservation with the usage
+Groq reports. Not bound to an event loop: state is guarded by a thread lock,
+and waiting is a sleep (asyncio.sleep or time.sleep) between checks.
+"""
+
+import asyncio
+import threading
+import time
+from collections import deque
+
+# Groq free tier for llama-3.1-8b-instant
+GROQ_RPM_LIMIT = 30
+GROQ_TPM_LIMIT = 6000
+QUOTA_WINDOW = 60.0             # seconds the limits are measured over
+QUOTA_POLL = 0.05               # seconds between checks while another call is first in line
+CHARS_PER_TOKEN = 4             # rough English average for Llama tokenizers
+
+
+def estimate_tokens(text: str, max_tokens: int) -> int:
+    """Tokens to reserve for a call: prompt estimate (system + user text) + the whole completion allowance."""
+    return len(text) // CHARS_PER_TOKEN + max_tokens
+
+
+class QuotaWindow:
+    """
+    Requests and tokens spent over the last QUOTA_WINDOW seconds, shared by
+    every call. A sliding log rather than a refilling bucket, so no 60 s
+    window ever sees more than rpm requests / tpm tokens. Callers are
+    admitted first come, first served: a large prompt isn't starved by a
+    stream of small ones.
+    """
+
+    def __init__(self, rpm: int = GROQ_RPM_LIMIT, tpm: int = GROQ_TPM_LIMIT, window: float = QUOTA_WINDOW):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.window = window
+        self.paused_until = 0.0
+        self._spent: deque = deque()     # [start time, tokens] per call
+        self._tokens = 0
+        self._waiting: deque = deque()   # one token object per acquire() in progress, in arrival order
+        self._lock = threading.Lock()
+
+    def _expire(self, now: float):
+        while self._spent and now - self._spent[0][0] >= self.window:
+            self._tokens -= self._spent.popleft()[1]
+
+    def _seconds_until_room(self, tokens: int, now: float) -> float:
+        """How long until enough of the log expires for one more call of `tokens`."""
+        excess_calls = len(self._spent) + 1 - self.rpm
+        excess_tokens = self._tokens + tokens - self.tpm
+        freed = 0
+        for n, (start, spent) in enumerate(self._spent, 1):
+            freed += spent
+            if n >= excess_calls and freed >= excess_tokens:
+                return start + self.window - now
+        return self.window
+
+    def _queue(self) -> object:
+        waiter = object()
+        with self._lock:
+            self._waiting.append(waiter)
+        return waiter
+
+    def _leave(self, waiter: object):
+        with self._lock:
+            self._waiting.remove(waiter)
+
+    def _try_reserve(self, waiter: object, tokens: int):
+        """(log entry, 0) if the call fits now and is first in line, else (None, seconds to wait)."""
+        with self._lock:
+            if self._waiting[0] is not waiter:
+                return None, QUOTA_POLL
+            now = time.monotonic()
+            self._expire(now)
+            wait = self.paused_until - now
+            if wait <= 0:
+                if len(self._spent) < self.rpm and self._tokens + tokens <= self.tpm:
+                    entry = [now, tokens]
+                    self._spent.append(entry)
+                    self._tokens += tokens
+                    return entry, 0
+                wait = self._seconds_until_room(tokens, now)
+            return None, max(wait, 0.01)
+
+    async def acquire(self, tokens: int) -> list:
+        """Wait until the call fits in the window; returns its log entry (for settle())."""
+        tokens = min(tokens, self.tpm)
+        waiter = self._queue()
+        try:
+            while True:
+                entry, wait = self._try_reserve(waiter, tokens)
+                if entry:
+                    return entry
+                await asyncio.sleep(wait)
+        finally:
+            self._leave(waiter)
+
+    def acquire_sync(self, tokens: int) -> list:
+        """acquire() for blocking callers: sleeps the calling thread instead."""
+        tokens = min(tokens, self.tpm)
+        waiter = self._queue()
+        try:
+            while True:
+                entry, wait = self._try_reserve(waiter, tokens)
+                if entry:
+                    return entry
+                time.sleep(wait)
+        finally:
+            self._leave(waiter)
+
+    def settle(self, entry: list, used: int):
+        """Replace a call's reserved tokens with what it actually used."""
+        with self._lock:
+            if any(e is entry for e in self._spent):    # else already expired from the window
+                self._tokens += used - entry[1]
+            entry[1] = used
+
+    def pause(self, seconds: float):
+        """Upstream said 429 — admit nothing for a while."""
+        with self._lock:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+
+# Shared by every AsyncGroqEngine and llm_engine's blocking calls
+QUOTA = QuotaWindow()
@@ -0,0 +1,160 @@
+"""
+host_guard.py - Per-host rate limiting, adaptive timeouts and circuit breaking
+Keeps scheduled runs predictable when one upstream misbehaves:
+- token bucket per host (rate halves on 429, creeps back on success)
+- timeouts derived from observed p95 latency instead of a fixed 15 s / 30 s
+- circuit breaker that skips a failing host for a cooldown window
+State is persisted to HOST_STATE_PATH so it survives between runs.
+"""
+
+import asyncio
+import json
+import os
+import time
+from collections import deque
+from typing import Dict
+from urllib.parse import urlsplit
+
+HOST_STATE_PATH = "host_state.json"
+# Homepage enrichment fetches keep separate state: slow or failing tool pages on
+# a host must not throttle, time out or trip the circuit for its API
+PAGE_HOST_STATE_PATH = "host_state_pages.json"
+
+# Token bucket (requests/second, burst) — per-host overrides below
+DEFAULT_RATE = 5.0
+DEFAULT_BURST = 10
+HOST_RATE_LIMITS = {
+    "huggingface.co": (3.0, 5),
+}
+MIN_RATE = 0.2                  # floor after repeated 429s
+
+# Adaptive timeouts
+LATENCY_WINDOW = 50             # samples kept per host
+MIN_LATENCY_SAMPLES = 5         # below this, the caller's default timeout is used
+TIMEOUT_P95_MULTIPLIER = 3.0
+MIN_TIMEOUT = 3.0               # seconds
+
+# Circuit breaker
+CIRCUIT_FAILURE_THRESHOLD = 3   # consecutive failures before the circuit opens
+CIRCUIT_COOLDOWN = 30 * 60      # seconds a failing host is skipped
+
+
+class HostUnavailable(Exception):
+    """Raised instead of requesting a host whose circuit is open."""
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+    def throttle(self):
+        """Upstream said 429 — halve the rate (AIMD)."""
+        self.rate = max(MIN_RATE, self.rate / 2)
+
+    def recover(self):
+        self.rate = min(self.max_rate, self.rate * 1.1)
+
+
+class HostState:
+    def __init__(self, host: str, saved: Dict = None):
+        saved = saved or {}
+        rate, burst = HOST_RATE_LIMITS.get(host, (DEFAULT_RATE, DEFAULT_BURST))
+        self.bucket = TokenBucket(rate, burst)
+        self.latencies = deque(saved.get("latencies", []), maxlen=LATENCY_WINDOW)
+        self.failures = saved.get("failures", 0)
+        self.open_until = saved.get("open_until", 0.0)
+
+    def timeout(self, default: float) -> float:
+        if len(self.latencies) < MIN_LATENCY_SAMPLES:
+            return default
+        ordered = sorted(self.latencies)
+        p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+        return round(min(default, max(MIN_TIMEOUT, p95 * TIMEOUT_P95_MULTIPLIER)), 2)
+
+    def to_dict(self) -> Dict:
+        return {
+            "latencies": [round(x, 3) for x in self.latencies],
+            "failures": self.failures,
+            "open_until": self.open_until,
+        }
+
+
+class HostGuard:
+    """Per-host limiter + adaptive timeout + circuit breaker, loaded from / saved to disk."""
+
+    def __init__(self, path: str = HOST_STATE_PATH):
+        self.path = path
+        self._saved: Dict = {}
+        self._hosts: Dict[str, HostState] = {}
+        try:
+            with open(path, encoding="utf-8") as f:
+                self._saved = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            self._saved = {}
+
+    def _state(self, url: str) -> HostState:
+        host = urlsplit(url).hostname or url
+        if host not in self._hosts:
+            self._hosts[host] = HostState(host, self._saved.get(host))
+        return self._hosts[host]
+
+    def check(self, url: str):
+        """Raise HostUnavailable while the host's circuit is open (half-open after cooldown)."""
+        state = self._state(url)
+        remaining = state.open_until - time.time()
+        if remaining > 0:
+            raise HostUnavailable(f"{urlsplit(url).hostname} circuit open — retry in {int(remaining)}s")
+
+    async def acquire(self, url: str):
+        await self._state(url).bucket.acquire()
+
+    def timeout_for(self, url: str, default: float) -> float:
+        return self._state(url).timeout(default)
+
+    def record(self, url: str, latency: float, ok: bool, status: int = None):
+        state = self._state(url)
+        if status == 429:
+            state.bucket.throttle()
+        elif ok:
+            state.bucket.recover()
+
+        if ok:
+            state.latencies.append(latency)
+            state.failures = 0
+            state.open_until = 0.0
+            return
+
+        state.failures += 1
+        if state.failures >= CIRCUIT_FAILURE_THRESHOLD:
+            state.open_until = time.time() + CIRCUIT_COOLDOWN
+            print(f"[HostGuard] {urlsplit(url).hostname} failed {state.failures}x — circuit open for {CIRCUIT_COOLDOWN}s")
+
+    def save(self):
+        data = dict(self._saved)
+        data.update({host: state.to_dict() for host, state in self._hosts.items()})
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp, self.path)
+
+
+if __name__ == "__main__":
+    guard = HostGuard()
+    for host, saved in guard._saved.items():
+        state = HostState(host, saved)
+        status = "OPEN" if state.open_until > time.time() else "closed"
+        print(f"  {host}: circuit {status}, failures={state.failures}, timeout={state.timeout(15)}s")
@@ -0,0 +1,129 @@
+"""
+html_parser.py - Pluggable HTML card extraction for Playwright-scraped pages
+Picks the fastest parser installed (selectolax > lxml > html.parser) and runs
+big pages in a process pool so parsing never blocks the asyncio event loop.
+"""
+
+import asyncio
+import html as html_lib
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, List, Tuple
+from bs4 import BeautifulSoup
+
+# C-backed parsers — selectolax is in requirements.txt; lxml is used if only it is installed
+try:
+    from selectolax.parser import HTMLParser
+    SELECTOLAX_AVAILABLE = True
+except ImportError:
+    SELECTOLAX_AVAILABLE = False
+
+try:
+    import lxml  # noqa: F401
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+if SELECTOLAX_AVAILABLE:
+    PARSER_BACKEND = "selectolax"
+elif LXML_AVAILABLE:
+    PARSER_BACKEND = "lxml"
+else:
+    PARSER_BACKEND = "html.parser"
+
+PARSE_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+PARSE_INLINE_MAX_CHARS = 200_000   # smaller pages aren't worth the IPC round trip
+
+NAME_TAGS = ["h2", "h3", "h4", "strong"]
+
+
+def _cards_selectolax(html: str, selector: str, limit: int) -> List[Tuple[str, str]]:
+    cards = []
+    for card in HTMLParser(html).css(selector)[:limit]:
+        name_tag = card.css_first(", ".join(NAME_TAGS))
+        desc_tag = card.css_first("p")
+        if name_tag and desc_tag:
+            cards.append((name_tag.text(strip=True), desc_tag.text(strip=True)))
+    return cards
+
+
+def _cards_soup(html: str, selector: str, limit: int, features: str) -> List[Tuple[str, str]]:
+    cards = []
+    soup = BeautifulSoup(html, features)
+    for card in soup.select(selector)[:limit]:
+        name_tag = card.find(NAME_TAGS)
+        desc_tag = card.find("p")
+        if name_tag and desc_tag:
+            cards.append((name_tag.get_text(strip=True), desc_tag.get_text(strip=True)))
+    return cards
+
+
+def extract_cards(html: str, selector: str, limit: int, backend: str = None) -> List[Tuple[str, str]]:
+    """
+    Return (name, description) for the first `limit` elements matching `selector`
+    that contain a heading/strong and a <p>. Top-level so it pickles into the pool.
+    """
+    backend = backend or PARSER_BACKEND
+    if backend == "selectolax":
+        return _cards_selectolax(html, selector, limit)
+    if backend == "lxml":
+        return _cards_soup(html, selector, limit, "lxml")
+    return _cards_soup(html, selector, limit, "html.parser")
+
+
+# ── Page metadata (<head> only — small enough for regex, no parser needed) ──
+_META_TAG_RE = re.compile(r"<meta\s+([^>]+)>", re.I)
+_ATTR_RE = re.compile(r"""([a-zA-Z:_-]+)\s*=\s*(?:"([^"]*)"|'([^']*)')""")
+_TITLE_RE = re.compile(r"<title[^>]*>(.*?)</title>", re.I | re.S)
+META_KEYS = ("og:title", "og:description", "twitter:description", "description", "keywords")
+
+
+def extract_page_meta(html: str) -> Dict[str, str]:
+    """title / description / keywords from a page head (og: tags preferred)."""
+    found = {}
+    for tag in _META_TAG_RE.finditer(html):
+        attrs = {m.group(1).lower(): m.group(2) if m.group(2) is not None else m.group(3)
+                 for m in _ATTR_RE.finditer(tag.group(1))}
+        key = (attrs.get("property") or attrs.get("name") or "").lower()
+        content = (attrs.get("content") or "").strip()
+        if key in META_KEYS and content and key not in found:
+            found[key] = html_lib.unescape(content)
+
+    title_match = _TITLE_RE.search(html)
+    title = html_lib.unescape(title_match.group(1)).strip() if title_match else ""
+    return {
+        "title": found.get("og:title") or title,
+        "description": found.get("og:description") or found.get("description") or found.get("twitter:description", ""),
+        "keywords": found.get("keywords", ""),
+    }
+
+
+# ── Process pool (CPU-bound parsing off the event loop) ───────────────────────
+_pool = None
+
+
+def get_parse_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(max_workers=PARSE_WORKERS)
+    return _pool
+
+
+def shutdown_parse_pool():
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(cancel_futures=True)
+        _pool = None
+
+
+async def extract_cards_async(html: str, selector: str, limit: int) -> List[Tuple[str, str]]:
+    """extract_cards() in the process pool (inline for small pages)."""
+    if len(html) <= PARSE_INLINE_MAX_CHARS:
+        return extract_cards(html, selector, limit)
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(get_parse_pool(), extract_cards, html, selector, limit, PARSER_BACKEND)
+
+
+if __name__ == "__main__":
+    print(f"HTML parser backend: {PARSER_BACKEND} ({PARSE_WORKERS} workers)")
@@ -0,0 +1,159 @@
+"""
+http_cache.py - Persistent conditional-fetch cache for scraper sources
+Stores ETag / Last-Modified validators, raw bodies and parsed tool lists per URL,
+so an unchanged source costs one 304 round trip and zero parsing. Homepage
+metadata from the enrichment stage is kept here too (separate keys).
+"""
+
+import hashlib
+import json
+import os
+from datetime import datetime
+from typing import List, Dict, Optional
+
+CACHE_DIR = ".http_cache"
+
+
+def _entry_paths(url: str):
+    """Meta (validators + parsed tools) and body file for a URL."""
+    key = hashlib.sha256(url.encode("utf-8")).hexdigest()[:32]
+    return (
+        os.path.join(CACHE_DIR, f"{key}.json"),
+        os.path.join(CACHE_DIR, f"{key}.body"),
+    )
+
+
+def _write_atomic(path: str, data: str):
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def load_entry(url: str) -> Optional[Dict]:
+    """Return the cached meta for a URL, or None if missing/corrupt."""
+    meta_path, _ = _entry_paths(url)
+    try:
+        with open(meta_path, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+
+def load_body(url: str) -> Optional[str]:
+    """Return the cached raw body for a URL, or None."""
+    _, body_path = _entry_paths(url)
+    try:
+        with open(body_path, encoding="utf-8") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def conditional_headers(url: str) -> Dict:
+    """If-None-Match / If-Modified-Since headers for a URL we have a body or parse for."""
+    entry = load_entry(url)
+    _, body_path = _entry_paths(url)
+    if not entry or (not os.path.exists(body_path) and entry.get("tools") is None):
+        return {}
+
+    headers = {}
+    if entry.get("etag"):
+        headers["If-None-Match"] = entry["etag"]
+    if entry.get("last_modified"):
+        headers["If-Modified-Since"] = entry["last_modified"]
+    return headers
+
+
+def store_response(url: str, headers, body: Optional[str], next_url: str = None):
+    """
+    Save validators + body from a 200 response. Parsed tools are reset.
+    A stream that was stopped early passes the prefix it read (marked by
+    store_parsed(complete=False)); body=None keeps only the validators.
+    next_url (a paginated response's Link rel="next") is kept so a 304 can still page on.
+    """
+    etag = headers.get("etag")
+    last_modified = headers.get("last-modified")
+    if not etag and not last_modified:
+        return  # Nothing to revalidate with — not worth caching
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    meta_path, body_path = _entry_paths(url)
+    if body is not None:
+        _write_atomic(body_path, body)
+    elif os.path.exists(body_path):
+        os.remove(body_path)
+    _write_atomic(meta_path, json.dumps({
+        "url": url,
+        "etag": etag,
+        "last_modified": last_modified,
+        "next_url": next_url,
+        "fetched_at": datetime.now().isoformat(),
+        "tools": None,
+    }))
+
+
+def store_parsed(url: str, tools: List[Dict], complete: bool = True):
+    """
+    Attach the parsed tool list to an existing entry (so a 304 can skip parsing).
+    complete=False marks a prefix — parsing stopped early at an item budget.
+    """
+    entry = load_entry(url)
+    if entry is None:
+        return
+    entry["tools"] = tools
+    entry["complete"] = complete
+    meta_path, _ = _entry_paths(url)
+    _write_atomic(meta_path, json.dumps(entry))
+
+
+def load_parsed(url: str, limit: int = None) -> Optional[List[Dict]]:
+    """
+    Parsed tools cached for a URL, or None if it was never parsed.
+    A cached prefix only counts if it already holds `limit` items.
+    """
+    entry = load_entry(url)
+    if not entry or entry.get("tools") is None:
+        return None
+    tools = entry["tools"]
+    if entry.get("complete", True):
+        return tools
+    if limit is not None and len(tools) >= limit:
+        return tools[:limit]
+    return None
+
+
+def store_page_meta(url: str, meta: Dict):
+    """Remember a homepage's title/description/keywords (scraper.enrich_homepages)."""
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    meta_path, _ = _entry_paths(f"page:{url}")
+    _write_atomic(meta_path, json.dumps({"url": url, "meta": meta, "fetched_at": datetime.now().isoformat()}))
+
+
+def load_page_meta(url: str, max_age_seconds: float) -> Optional[Dict]:
+    """Homepage meta stored less than max_age_seconds ago, or None."""
+    entry = load_entry(f"page:{url}")
+    if not entry:
+        return None
+    age = datetime.now() - datetime.fromisoformat(entry["fetched_at"])
+    return entry["meta"] if age.total_seconds() < max_age_seconds else None
+
+
+def drop_entry(url: str):
+    """Forget a single URL (e.g. a 304 arrived but nothing usable is cached)."""
+    for path in _entry_paths(url):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def clear_cache():
+    """Remove every cached entry."""
+    if not os.path.isdir(CACHE_DIR):
+        return
+    for fname in os.listdir(CACHE_DIR):
+        os.remove(os.path.join(CACHE_DIR, fname))
+
+
+if __name__ == "__main__":
+    n = len(os.listdir(CACHE_DIR)) // 2 if os.path.isdir(CACHE_DIR) else 0
+    print(f"HTTP cache entries: {n}")
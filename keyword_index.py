@@ -0,0 +1,219 @@
+"""
+keyword_index.py - Compiled keyword matchers shared by the classifier and the recommender
+Both rule sets — "classify" (tool text → category, classifier.py) and
+"task" (user task → category, llm_engine.keyword_recommend) — are compiled
+once into token-level matchers. Rules can be overridden from
+KEYWORD_RULES_PATH; the file is re-read whenever it changes, so a running
+API picks up edited rules without a restart.
+Write the defaults out as a starting point: python keyword_index.py dump
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+KEYWORD_RULES_PATH = "keyword_rules.json"
+RELOAD_CHECK_SECONDS = 2.0      # how often matcher() stats the rules file
+
+# ── Default rules per category ────────────────────────────────────────────────
+DEFAULT_RULES: Dict[str, Dict[str, list]] = {
+    # Tool name + description → category (classifier.keyword_classify)
+    "classify": {
+        "Code Generation":      ["code", "coding", "programming", "developer", "github", "copilot",
+                                  "IDE", "autocomplete", "refactor", "debugging", "python", "javascript"],
+        "Image Generation":     ["image", "photo", "art", "picture", "illustration", "stable diffusion",
+                                  "dall-e", "midjourney", "text-to-image", "artwork", "visual", "generate image"],
+        "Video Generation":     ["video", "animation", "movie", "film", "cinematic", "text-to-video",
+                                  "runway", "sora", "clip", "render"],
+        "Audio & Speech":       ["audio", "voice", "speech", "tts", "transcription", "podcast",
+                                  "music", "sound", "whisper", "elevenlabs", "clone voice"],
+        "Data Analysis":        ["data", "analytics", "dashboard", "chart", "sql", "csv", "excel",
+                                  "visualization", "bi", "insights", "statistics", "tableau"],
+        "Writing & Content":    ["write", "writing", "blog", "seo", "copywriting", "content",
+                                  "essay", "article", "marketing copy", "social media", "jasper"],
+        "Automation & Agents":  ["automate", "automation", "workflow", "agent", "pipeline",
+                                  "zapier", "n8n", "task", "autonomous", "schedule", "bot"],
+        "Search & Research":    ["search", "research", "browse", "web", "real-time", "citation",
+                                  "knowledge", "perplexity", "question answering", "fact"],
+        "Chatbot & Assistant":  ["chat", "chatbot", "assistant", "conversation", "customer service",
+                                  "support", "dialogue", "gpt", "claude", "gemini"],
+    },
+    # What a user wants to do → category (llm_engine.keyword_recommend)
+    "task": {
+        "Code Generation":      ["code", "coding", "programming", "developer", "debug", "script", "function", "github", "python", "javascript", "build app", "software"],
+        "Image Generation":     ["image", "photo", "picture", "art", "illustration", "logo", "design", "visual", "draw", "generate image"],
+        "Video Generation":     ["video", "animation", "movie", "clip", "reel", "youtube", "short film"],
+        "Audio & Speech":       ["audio", "voice", "speech", "podcast", "transcribe", "tts", "music", "sound", "record"],
+        "Data Analysis":        ["data", "analyse", "analyze", "analytics", "chart", "graph", "csv", "excel", "dashboard", "sql", "statistics", "insights"],
+        "Writing & Content":    ["write", "writing", "blog", "article", "essay", "content", "seo", "copywrite", "social media", "caption"],
+        "Automation & Agents":  ["automate", "automation", "workflow", "agent", "task", "schedule", "pipeline", "bot", "integrate"],
+        "Search & Research":    ["search", "research", "find", "browse", "information", "fact", "knowledge", "answer"],
+        "Chatbot & Assistant":  ["chat", "chatbot", "assistant", "conversation", "customer support", "help", "question"],
+    },
+}
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def _surface_forms(token: str) -> frozenset:
+    return frozenset((token, token + "s", token + "es"))
+
+
+def compile_keyword_rules(rules: Dict[str, list]) -> Tuple[Dict[str, List[Tuple[tuple, int]]], List[List[int]]]:
+    """
+    Compile keyword rules into a token-level lookup so every keyword is found
+    in one pass over the text's words. Matching is on whole words (a trailing
+    plural "s"/"es" is allowed), so "bi" no longer fires on "ambitious" nor
+    "art" on "start"; "real-time" and "real time" are the same keyword.
+    Returns (index, owners): index maps a first word form to
+    [(remaining word forms, keyword id), ...], longest keywords first;
+    owners[keyword id] lists the indexes of the categories using that keyword.
+    """
+    owners_by_kw: Dict[tuple, List[int]] = {}
+    for ci, keywords in enumerate(rules.values()):
+        for kw in keywords:
+            words = tuple(_TOKEN_RE.findall(kw.lower()))
+            if words:
+                owners_by_kw.setdefault(words, []).append(ci)
+
+    index: Dict[str, List[Tuple[tuple, int]]] = {}
+    owners: List[List[int]] = []
+    for words in sorted(owners_by_kw, key=len, reverse=True):
+        kw_id = len(owners)
+        owners.append(owners_by_kw[words])
+        # Only the last word of a keyword may be pluralised
+        forms = [frozenset((w,)) for w in words[:-1]] + [_surface_forms(words[-1])]
+        for first in forms[0]:
+            index.setdefault(first, []).append((tuple(forms[1:]), kw_id))
+    return index, owners
+
+
+class KeywordMatcher:
+    """One compiled rule set: per-category keyword hit counts for a text or a batch of texts."""
+
+    def __init__(self, rules: Dict[str, list]):
+        self.rules = rules
+        self.categories = list(rules)                   # column order of score_matrix()
+        self.sizes = np.array([len(rules[c]) for c in self.categories])
+        self.version = hashlib.sha256(json.dumps(rules, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+        self._index, self._owners = compile_keyword_rules(rules)
+        # keyword x category incidence matrix, for batch scoring
+        self._matrix = np.zeros((len(self._owners), len(self.categories)), dtype=np.int32)
+        for kw_id, owners in enumerate(self._owners):
+            self._matrix[kw_id, owners] = 1
+
+    def match(self, text: str) -> set:
+        """Ids of the distinct keywords found in text (one pass over its words)."""
+        tokens = _TOKEN_RE.findall(text.lower())
+        matched = set()
+        for i, token in enumerate(tokens):
+            for rest, kw_id in self._index.get(token, ()):
+                if not rest or (i + len(rest) < len(tokens)
+                                and all(tokens[i + 1 + j] in forms for j, forms in enumerate(rest))):
+                    matched.add(kw_id)
+        return matched
+
+    def scores(self, text: str) -> Dict[str, int]:
+        """Number of distinct keywords of each category found in text."""
+        scores = dict.fromkeys(self.categories, 0)
+        for kw_id in self.match(text):
+            for ci in self._owners[kw_id]:
+                scores[self.categories[ci]] += 1
+        return scores
+
+    def score_matrix(self, texts: List[str]) -> np.ndarray:
+        """
+        scores() for many texts as a (texts x categories) matrix. The keyword
+        hits form a sparse text x keyword matrix H (as row/col index pairs),
+        and H @ incidence matrix is accumulated with np.add.at.
+        """
+        rows, cols = [], []
+        for row, text in enumerate(texts):
+            matched = self.match(text)
+            rows.extend([row] * len(matched))
+            cols.extend(matched)
+        scores = np.zeros((len(texts), len(self.categories)), dtype=np.int32)
+        np.add.at(scores, np.array(rows, dtype=np.intp), self._matrix[np.array(cols, dtype=np.intp)])
+        return scores
+
+
+class KeywordIndex:
+    """
+    Matchers for every rule set, compiled from DEFAULT_RULES overlaid with
+    the rules file (a set present in the file replaces the default one).
+    get() re-reads the file when its mtime changes; a broken file is
+    reported and the previous matchers are kept.
+    """
+
+    def __init__(self, path: str = KEYWORD_RULES_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._mtime = None
+        self._checked = 0.0
+        self._matchers = self._compile({})
+        self.reload()
+
+    @staticmethod
+    def _compile(overrides: Dict[str, Dict[str, list]]) -> Dict[str, KeywordMatcher]:
+        return {name: KeywordMatcher(overrides.get(name) or rules) for name, rules in DEFAULT_RULES.items()}
+
+    def reload(self) -> bool:
+        """Recompile from the rules file if it changed. Returns True when the matchers were replaced."""
+        with self._lock:
+            self._checked = time.monotonic()
+            try:
+                mtime = os.stat(self.path).st_mtime_ns
+            except OSError:
+                mtime = None
+            if mtime == self._mtime:
+                return False
+            try:
+                overrides = {}
+                if mtime is not None:
+                    with open(self.path, encoding="utf-8") as f:
+                        overrides = json.load(f)
+                matchers = self._compile(overrides)
+            except (OSError, ValueError, TypeError, AttributeError) as e:
+                print(f"[KeywordIndex] Could not load {self.path}: {e} — keeping current rules")
+                self._mtime = mtime
+                return False
+            self._matchers = matchers      # swapped whole: readers never see a half-built index
+            self._mtime = mtime
+            if mtime is not None:
+                print(f"[KeywordIndex] Loaded keyword rules from {self.path}")
+            return True
+
+    def get(self, name: str) -> KeywordMatcher:
+        if time.monotonic() - self._checked >= RELOAD_CHECK_SECONDS:
+            self.reload()
+        return self._matchers[name]
+
+
+_INDEX = KeywordIndex()
+
+
+def matcher(name: str) -> KeywordMatcher:
+    """Current compiled matcher for a rule set ("classify" or "task")."""
+    return _INDEX.get(name)
+
+
+def reload() -> bool:
+    """Pick up rules-file edits now instead of within RELOAD_CHECK_SECONDS."""
+    return _INDEX.reload()
+
+
+if __name__ == "__main__":
+    import sys
+    if sys.argv[1:] == ["dump"]:
+        with open(KEYWORD_RULES_PATH, "w", encoding="utf-8") as f:
+            json.dump(DEFAULT_RULES, f, indent=2)
+        print(f"Wrote default rules to {KEYWORD_RULES_PATH}")
+    for name in DEFAULT_RULES:
+        m = matcher(name)
+        print(f"  {name}: {len(m.categories)} categories, {int(m.sizes.sum())} keywords (version {m.version})")
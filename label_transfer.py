@@ -0,0 +1,119 @@
+"""
+label_transfer.py - Nearest-neighbour label transfer from already-classified tools
+A fork, a renamed HF space or last run's copy of the same tool gets the
+enrichment of its near-identical, already LLM-enriched neighbour instead of
+a fresh Groq call. In-memory MinHash/LSH over character 4-grams of
+name + description (same XOR-mask scheme as dedup.py), built from the
+tools table at the start of a run.
+"""
+
+import random
+import re
+import zlib
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from classifier import is_llm_labelled
+from dedup import GENERATED_DESC_PREFIXES, normalize_name
+
+LABEL_TRANSFER_THRESHOLD = 0.9   # estimated Jaccard of char 4-grams needed to copy labels
+CHAR_NGRAM = 4
+NUM_PERM = 64
+LSH_BANDS = 8                    # 8 bands x 8 rows → ~99% recall at 0.9, few candidates below 0.7
+LSH_ROWS = NUM_PERM // LSH_BANDS
+MIN_NGRAMS = 8                   # too-short texts are never matched
+
+# Fields copied from the neighbour (everything the LLM would have produced)
+TRANSFER_FIELDS = ("category", "best_for_tasks", "summary", "audience_fit", "tags", "pricing_hint")
+
+_rng = random.Random(4099)       # fixed seed → signatures comparable across runs
+_MASKS = np.array([_rng.getrandbits(32) for _ in range(NUM_PERM)], dtype=np.uint32)
+
+_NON_ALNUM_RE = re.compile(r"[^a-z0-9]+")
+
+
+def _text(name: str, description: str) -> str:
+    # Scraper-generated descriptions are shared by unrelated tools — match on the name alone
+    if (description or "").lower().startswith(GENERATED_DESC_PREFIXES):
+        description = ""
+    return _NON_ALNUM_RE.sub(" ", f"{name} {description}".lower()).strip()
+
+
+def signature(name: str, description: str) -> Optional[np.ndarray]:
+    """MinHash signature of the char n-grams of name + description, or None if too short."""
+    text = _text(name, description)
+    grams = {text[i:i + CHAR_NGRAM] for i in range(len(text) - CHAR_NGRAM + 1)}
+    if len(grams) < MIN_NGRAMS:
+        return None
+    hashes = np.fromiter((zlib.crc32(g.encode("utf-8")) for g in grams), dtype=np.uint32, count=len(grams))
+    return (hashes[:, None] ^ _MASKS).min(axis=0)
+
+
+class NeighbourIndex:
+    """
+    add() enriched tools, then transfer(name, description) returns the
+    enrichment of the most similar other tool — if it clears the threshold —
+    with label_source (the name of the tool it was copied from; row ids
+    don't survive a full run replacing the table) and its similarity.
+    A tool never matches its own earlier copy (same normalized name): that
+    is the classification cache's job, which knows the classifier version.
+    """
+
+    def __init__(self, threshold: float = LABEL_TRANSFER_THRESHOLD):
+        self.threshold = threshold
+        self._buckets: Dict[tuple, List[int]] = {}
+        self._labels: List[Dict] = []
+        self._names: List[str] = []
+        self._signatures: List[np.ndarray] = []
+        self.transferred = 0
+
+    def __len__(self) -> int:
+        return len(self._labels)
+
+    def add(self, tool: Dict):
+        sig = signature(tool["name"], tool.get("description") or "")
+        if sig is None:
+            return
+        idx = len(self._labels)
+        label = {field: tool.get(field) for field in TRANSFER_FIELDS}
+        label["label_source"] = tool["name"]
+        self._labels.append(label)
+        self._names.append(normalize_name(tool["name"]))
+        self._signatures.append(sig)
+        for band in range(LSH_BANDS):
+            key = (band, sig[band * LSH_ROWS:(band + 1) * LSH_ROWS].tobytes())
+            self._buckets.setdefault(key, []).append(idx)
+
+    def transfer(self, name: str, description: str) -> Optional[Dict]:
+        sig = signature(name, description)
+        if sig is None:
+            return None
+        candidates = set()
+        for band in range(LSH_BANDS):
+            candidates.update(self._buckets.get((band, sig[band * LSH_ROWS:(band + 1) * LSH_ROWS].tobytes()), ()))
+        own_name = normalize_name(name)
+        best, best_sim = None, self.threshold
+        for idx in candidates:
+            if self._names[idx] == own_name:
+                continue
+            sim = float((self._signatures[idx] == sig).mean())
+            if sim >= best_sim:
+                best, best_sim = idx, sim
+        if best is None:
+            return None
+        self.transferred += 1
+        return dict(self._labels[best], similarity=round(best_sim, 2))
+
+
+def build_index(tools: List[Dict], version: str = None, threshold: float = LABEL_TRANSFER_THRESHOLD) -> NeighbourIndex:
+    """
+    Index the LLM-enriched tools among `tools` (e.g. database.get_all_tools()).
+    With `version` (classifier.classifier_version()), only rows labelled by
+    that classifier version count — a prompt or rules change isn't bypassed.
+    """
+    index = NeighbourIndex(threshold)
+    for tool in tools:
+        if is_llm_labelled(tool) and (version is None or tool.get("classifier_version") == version):
+            index.add(tool)
+    return index
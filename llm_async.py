@@ -0,0 +1,100 @@
+"""
+llm_async.py - Async Groq client within the shared requests/min + tokens/min budget
+Replaces fixed per-call sleeps: every call reserves its estimated tokens
+against groq_quota.QUOTA (a sliding 60 s window shared with llm_engine's
+blocking calls), the reservation is corrected from the usage Groq reports,
+and up to MAX_IN_FLIGHT calls run concurrently — as many as the quota
+allows, never more.
+One AsyncGroqEngine per event loop (asyncio.run), used as `async with`.
+"""
+
+import asyncio
+import time
+from typing import Dict, Optional
+
+from groq import AsyncGroq, RateLimitError
+
+from groq_quota import QUOTA, QuotaWindow
+from groq_quota import estimate_tokens as estimate_text_tokens
+from llm_engine import GROQ_API_KEY, MODEL, SYSTEM_PROMPT, classification_prompt, parse_enrichment
+
+MAX_IN_FLIGHT = 8               # concurrent calls; the quota usually binds first
+MAX_RETRIES = 3
+ENRICH_MAX_TOKENS = 512
+
+
+def estimate_tokens(prompt: str, max_tokens: int) -> int:
+    """Tokens to reserve for a call: prompt estimate + the whole completion allowance."""
+    return estimate_text_tokens(SYSTEM_PROMPT + prompt, max_tokens)
+
+
+class AsyncGroqEngine:
+    """Concurrent Groq calls within the process-wide QuotaWindow (groq_quota.QUOTA unless given one)."""
+
+    def __init__(self, api_key: str = GROQ_API_KEY, quota: QuotaWindow = None, max_in_flight: int = MAX_IN_FLIGHT):
+        # The SDK's own 429 retries would bypass the shared quota — retries happen here
+        self.client = AsyncGroq(api_key=api_key, max_retries=0) if api_key else None
+        self.quota = quota or QUOTA
+        self._in_flight = asyncio.Semaphore(max_in_flight)
+        self.calls = 0
+        self.tokens_used = 0
+        self.api_seconds = 0.0      # time spent inside Groq calls (not waiting on the quota)
+
+    async def complete(self, prompt: str, max_tokens: int = ENRICH_MAX_TOKENS) -> str:
+        """Async _call_groq(): the reply text, "{}" without a key, "__FALLBACK__" on failure."""
+        if not self.client:
+            return "{}"
+        reserved = estimate_tokens(prompt, max_tokens)
+        async with self._in_flight:
+            for attempt in range(MAX_RETRIES):
+                entry = await self.quota.acquire(reserved)
+                start = time.monotonic()
+                try:
+                    response = await self.client.chat.completions.create(
+                        model=MODEL,
+                        messages=[
+                            {"role": "system", "content": SYSTEM_PROMPT},
+                            {"role": "user", "content": prompt},
+                        ],
+                        max_tokens=max_tokens,
+                        temperature=0.2,
+                    )
+                except RateLimitError as e:
+                    wait = _retry_after(e) or 3 * (attempt + 1)
+                    print(f"[LLM] Rate limit — pausing all calls {wait:.0f}s (retry {attempt+1}/{MAX_RETRIES})...")
+                    self.quota.settle(entry, 0)     # the retry reserves afresh
+                    self.quota.pause(wait)
+                    continue
+                except Exception as e:      # same keyword fallback as _call_groq
+                    print(f"[LLM] Groq API error: {e}")
+                    self.quota.settle(entry, 0)
+                    return "__FALLBACK__"
+                self.api_seconds += time.monotonic() - start
+                used = response.usage.total_tokens if response.usage else reserved
+                self.quota.settle(entry, used)
+                self.calls += 1
+                self.tokens_used += used
+                return response.choices[0].message.content.strip()
+        print("[LLM] Rate limit retries exhausted — keyword fallback will be used")
+        return "__FALLBACK__"
+
+    async def classify_and_enrich(self, name: str, description: str) -> Dict:
+        """Async llm_engine.classify_and_enrich_tool()."""
+        return parse_enrichment(await self.complete(classification_prompt(name, description)), description)
+
+    async def aclose(self):
+        if self.client:
+            await self.client.close()
+
+    async def __aenter__(self) -> "AsyncGroqEngine":
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+
+def _retry_after(error: RateLimitError) -> Optional[float]:
+    try:
+        return float(error.response.headers.get("retry-after"))
+    except (AttributeError, TypeError, ValueError):
+        return None
@@ -9,6 +9,9 @@ import re
 from groq import Groq
 from typing import Dict, List
 
+from groq_quota import QUOTA, estimate_tokens
+from keyword_index import matcher
+
 # ── Load .env (local) or Streamlit secrets (cloud) ───────────────────────────
 try:
     from dotenv import load_dotenv
@@ -32,7 +35,8 @@ if not GROQ_API_KEY or GROQ_API_KEY == "YOUR_GROQ_API_KEY_HERE":
 else:
     print(f"Groq API key loaded: {GROQ_API_KEY[:8]}...")
 
-client = Groq(api_key=GROQ_API_KEY) if GROQ_API_KEY else None
+# The SDK's own 429 retries would bypass the shared quota (groq_quota.py) — retries happen here
+client = Groq(api_key=GROQ_API_KEY, max_retries=0) if GROQ_API_KEY else None
 MODEL = "llama-3.1-8b-instant"
 
 
@@ -51,36 +55,28 @@ CATEGORIES = [
 ]
 
 # ── Keyword-based fallback recommendation (works WITHOUT Groq key) ───────────
-TASK_KEYWORDS = {
-    "Code Generation":      ["code", "coding", "programming", "developer", "debug", "script", "function", "github", "python", "javascript", "build app", "software"],
-    "Image Generation":     ["image", "photo", "picture", "art", "illustration", "logo", "design", "visual", "draw", "generate image"],
-    "Video Generation":     ["video", "animation", "movie", "clip", "reel", "youtube", "short film"],
-    "Audio & Speech":       ["audio", "voice", "speech", "podcast", "transcribe", "tts", "music", "sound", "record"],
-    "Data Analysis":        ["data", "analyse", "analyze", "analytics", "chart", "graph", "csv", "excel", "dashboard", "sql", "statistics", "insights"],
-    "Writing & Content":    ["write", "writing", "blog", "article", "essay", "content", "seo", "copywrite", "social media", "caption"],
-    "Automation & Agents":  ["automate", "automation", "workflow", "agent", "task", "schedule", "pipeline", "bot", "integrate"],
-    "Search & Research":    ["search", "research", "find", "browse", "information", "fact", "knowledge", "answer"],
-    "Chatbot & Assistant":  ["chat", "chatbot", "assistant", "conversation", "customer support", "help", "question"],
-}
+# Task keywords live in keyword_index.py ("task" rule set)
+
 
 def keyword_recommend(task: str, available_tools: List[Dict]) -> Dict:
     """Fallback recommendation using keyword matching — works without Groq API.
     Returns top 5 tools ranked by category match."""
-    task_lower = task.lower()
-
     # Score each category against the task
-    scores = {}
-    for cat, keywords in TASK_KEYWORDS.items():
-        scores[cat] = sum(1 for kw in keywords if kw in task_lower)
+    scores = matcher("task").scores(task)
 
     best_cat = max(scores, key=scores.get)
     if scores[best_cat] == 0:
         best_cat = "Chatbot & Assistant"
 
-    # Sort tools: matching category first, then others
+    # Sort tools: matching category first, then tools with it as a secondary
+    # category (strongest first, from the stored category_scores), then others
     cat_tools   = [t for t in available_tools if t.get("category") == best_cat]
-    other_tools = [t for t in available_tools if t.get("category") != best_cat]
-    ranked      = (cat_tools + other_tools)[:5]
+    secondary   = sorted((t for t in available_tools
+                          if t.get("category") != best_cat and (t.get("category_scores") or {}).get(best_cat)),
+                         key=lambda t: -t["category_scores"][best_cat])
+    other_tools = [t for t in available_tools
+                   if t.get("category") != best_cat and not (t.get("category_scores") or {}).get(best_cat)]
+    ranked      = (cat_tools + secondary + other_tools)[:5]
 
     top_tool = ranked[0] if ranked else {}
     alt_tool = ranked[1] if len(ranked) > 1 else {}
@@ -99,35 +95,38 @@ def keyword_recommend(task: str, available_tools: List[Dict]) -> Dict:
     }
 
 
+SYSTEM_PROMPT = "You are an AI tool analyst. Always respond with valid JSON only. No explanation, no markdown, just raw JSON."
+
+
 def _call_groq(prompt: str, max_tokens: int = 512) -> str:
-    """Call Groq API with automatic retry on rate limit (429)."""
-    import time
+    """Call Groq API within the shared quota, with automatic retry on rate limit (429)."""
     if not client:
         return "{}"
+    reserved = estimate_tokens(SYSTEM_PROMPT + prompt, max_tokens)
     for attempt in range(3):  # retry up to 3 times
+        entry = QUOTA.acquire_sync(reserved)
         try:
             response = client.chat.completions.create(
                 model=MODEL,
                 messages=[
-                    {
-                        "role": "system",
-                        "content": "You are an AI tool analyst. Always respond with valid JSON only. No explanation, no markdown, just raw JSON.",
-                    },
+                    {"role": "system", "content": SYSTEM_PROMPT},
                     {"role": "user", "content": prompt},
                 ],
                 max_tokens=max_tokens,
                 temperature=0.2,
             )
-            return response.choices[0].message.content.strip()
         except Exception as e:
+            QUOTA.settle(entry, 0)
             err = str(e)
             if "429" in err or "rate_limit" in err:
                 wait = 3 * (attempt + 1)
-                print(f"[LLM] Rate limit — waiting {wait}s (retry {attempt+1}/3)...")
-                time.sleep(wait)
-            else:
-                print(f"[LLM] Groq API error: {e}")
-                return "__FALLBACK__"
+                print(f"[LLM] Rate limit — pausing all calls {wait}s (retry {attempt+1}/3)...")
+                QUOTA.pause(wait)
+                continue
+            print(f"[LLM] Groq API error: {e}")
+            return "__FALLBACK__"
+        QUOTA.settle(entry, response.usage.total_tokens if response.usage else reserved)
+        return response.choices[0].message.content.strip()
     print("[LLM] Rate limit retries exhausted — keyword fallback will be used")
     return "__FALLBACK__"
 
@@ -147,9 +146,9 @@ def _parse_json_safe(text: str) -> dict:
     return {}
 
 
-def classify_and_enrich_tool(name: str, description: str) -> Dict:
-    """Classify tool using Groq LLM."""
-    prompt = f"""
+def classification_prompt(name: str, description: str) -> str:
+    """User prompt for classify_and_enrich_tool()."""
+    return f"""
 Analyze this AI tool and return a JSON object:
 
 Tool Name: {name}
@@ -171,8 +170,30 @@ Return this exact JSON structure:
   "pricing_hint": "Free/Freemium/Paid/Open-source"
 }}
 """
-    raw = _call_groq(prompt)
+
+
+def classify_and_enrich_tool(name: str, description: str) -> Dict:
+    """Classify tool using Groq LLM."""
+    return parse_enrichment(_call_groq(classification_prompt(name, description)), description)
+
+
+def parse_enrichment(raw: str, description: str) -> Dict:
+    """
+    classify_and_enrich_tool() result from the raw model reply (defaults for anything missing).
+    A call that failed ("__FALLBACK__", "{}" without a key) or answered no category
+    comes back with llm_failed=True — see classifier.apply_llm_result().
+    """
     result = _parse_json_safe(raw)
+    if "category" not in result:
+        return {
+            "category": "Other",
+            "best_for_tasks": [],
+            "summary": description[:200],
+            "audience_fit": {},
+            "tags": [],
+            "pricing_hint": "Unknown",
+            "llm_failed": True,
+        }
 
     return {
         "category": result.get("category", "Other"),
@@ -254,15 +275,19 @@ Write a 3-sentence trend analysis about the current state of AI tools.
 What categories dominate? What does this tell us about where AI is heading?
 Return as plain text only, no JSON.
 """
+    reserved = estimate_tokens(prompt, 200)
+    entry = QUOTA.acquire_sync(reserved)
     try:
         response = client.chat.completions.create(
             model=MODEL,
             messages=[{"role": "user", "content": prompt}],
             max_tokens=200,
         )
-        return response.choices[0].message.content.strip()
     except Exception:
+        QUOTA.settle(entry, 0)
         return f"AI tools are rapidly evolving. Top categories: {cat_summary}."
+    QUOTA.settle(entry, response.usage.total_tokens if response.usage else reserved)
+    return response.choices[0].message.content.strip()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,142 @@
+"""
+local_model.py - Local classifier tier between keyword rules and the LLM
+Hashed TF-IDF features (word uni+bigrams) + a softmax linear classifier,
+trained with NumPy from the categories the LLM assigned in earlier runs.
+Inference is a few dozen hashed lookups — microseconds per tool on CPU.
+Retrained as a pipeline step; saved to LOCAL_MODEL_PATH.
+"""
+
+import math
+import re
+import zlib
+from collections import Counter
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+LOCAL_MODEL_PATH = "local_model.npz"
+
+HASH_DIM = 2 ** 14            # feature buckets (collisions are harmless at this size)
+LOCAL_MODEL_CONFIDENCE = 0.7  # min softmax probability to accept a local prediction
+MIN_TRAINING_SAMPLES = 50     # below this a model isn't trained (too few LLM labels yet)
+TRAIN_EPOCHS = 300
+LEARNING_RATE = 0.5           # AdaGrad base step — rare features still move quickly
+L2_PENALTY = 1e-4
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def _hashed_terms(text: str) -> Counter:
+    words = _TOKEN_RE.findall(text.lower())
+    terms = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    # crc32, not hash(): feature ids must be stable across processes
+    return Counter(zlib.crc32(t.encode("utf-8")) % HASH_DIM for t in terms)
+
+
+def _vectorize(counts: Counter, idf: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """Sparse L2-normalised TF-IDF row as (feature ids, values)."""
+    ids = np.fromiter(counts.keys(), dtype=np.intp, count=len(counts))
+    tf = np.fromiter((1 + math.log(c) for c in counts.values()), dtype=np.float64, count=len(counts))
+    values = tf * idf[ids]
+    norm = np.linalg.norm(values)
+    return ids, (values / norm if norm else values)
+
+
+def _softmax(logits: np.ndarray) -> np.ndarray:
+    logits = logits - logits.max(axis=-1, keepdims=True)
+    exp = np.exp(logits)
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+
+class LocalModel:
+    """Linear softmax classifier over hashed TF-IDF features."""
+
+    def __init__(self, categories: List[str], weights: np.ndarray, bias: np.ndarray, idf: np.ndarray):
+        self.categories = categories
+        self.weights = weights      # HASH_DIM x categories
+        self.bias = bias
+        self.idf = idf
+
+    def predict(self, text: str) -> Tuple[str, float]:
+        """(category, probability) for one text."""
+        ids, values = _vectorize(_hashed_terms(text), self.idf)
+        probs = _softmax(values @ self.weights[ids] + self.bias)
+        best = int(probs.argmax())
+        return self.categories[best], round(float(probs[best]), 2)
+
+    def save(self, path: str = LOCAL_MODEL_PATH):
+        np.savez_compressed(path, categories=np.array(self.categories), weights=self.weights,
+                            bias=self.bias, idf=self.idf)
+
+
+def train(texts: List[str], labels: List[str]) -> Optional[LocalModel]:
+    """
+    Fit a LocalModel by full-batch AdaGrad on softmax cross-entropy.
+    Returns None when there's too little (or too uniform) data to learn from.
+    """
+    pairs = [(counts, label) for counts, label in zip(map(_hashed_terms, texts), labels) if counts]
+    term_counts = [counts for counts, _ in pairs]
+    labels = [label for _, label in pairs]
+    categories = sorted(set(labels))
+    if len(term_counts) < MIN_TRAINING_SAMPLES or len(categories) < 2:
+        return None
+
+    df = np.zeros(HASH_DIM)
+    for counts in term_counts:
+        df[np.fromiter(counts.keys(), dtype=np.intp, count=len(counts))] += 1
+    idf = np.log((1 + len(term_counts)) / (1 + df)) + 1
+    idf[df == 0] = 0    # words never seen in training carry no signal — don't let them dilute the rest
+
+    # Sparse design matrix as flat (row, feature id, value) triplets
+    rows, ids, values = [], [], []
+    for row, counts in enumerate(term_counts):
+        f_ids, f_values = _vectorize(counts, idf)
+        rows.append(np.full(len(f_ids), row))
+        ids.append(f_ids)
+        values.append(f_values)
+    rows, ids, values = np.concatenate(rows), np.concatenate(ids), np.concatenate(values)
+    # Scatter-adds via reduceat over contiguous groups (np.add.at is ~10x slower):
+    # triplets are already grouped by row; a fixed permutation groups them by feature
+    row_starts = np.flatnonzero(np.r_[True, rows[1:] != rows[:-1]])
+    by_feature = np.argsort(ids, kind="stable")
+    feature_ids, feature_starts = np.unique(ids[by_feature], return_index=True)
+
+    y = np.array([categories.index(label) for label in labels])
+    targets = np.eye(len(categories))[y]
+    weights = np.zeros((HASH_DIM, len(categories)))
+    bias = np.zeros(len(categories))
+    n = len(term_counts)
+    grad_sq = np.full((len(feature_ids), len(categories)), 1e-8)
+    bias_grad_sq = np.full(len(categories), 1e-8)
+
+    for _ in range(TRAIN_EPOCHS):
+        logits = np.add.reduceat(values[:, None] * weights[ids], row_starts)
+        error = (_softmax(logits + bias) - targets) / n
+        grad = np.add.reduceat((values[:, None] * error[rows])[by_feature], feature_starts)
+        grad += L2_PENALTY * weights[feature_ids]
+        grad_sq += grad ** 2
+        weights[feature_ids] -= LEARNING_RATE * grad / np.sqrt(grad_sq)
+        bias_grad = error.sum(axis=0)
+        bias_grad_sq += bias_grad ** 2
+        bias -= LEARNING_RATE * bias_grad / np.sqrt(bias_grad_sq)
+
+    return LocalModel(categories, weights, bias, idf)
+
+
+def load_model(path: str = LOCAL_MODEL_PATH) -> Optional[LocalModel]:
+    try:
+        data = np.load(path)
+    except (OSError, ValueError):
+        return None
+    return LocalModel([str(c) for c in data["categories"]], data["weights"], data["bias"], data["idf"])
+
+
+def train_from_examples(examples: List[Dict], path: str = LOCAL_MODEL_PATH) -> Optional[LocalModel]:
+    """Train on [{"text", "category"}] (see database.get_llm_labelled_tools) and save."""
+    model = train([e["text"] for e in examples], [e["category"] for e in examples])
+    if model is None:
+        print(f"[LocalModel] {len(examples)} LLM-labelled tools — need {MIN_TRAINING_SAMPLES}+ in 2+ categories, not training")
+        return None
+    model.save(path)
+    print(f"[LocalModel] Trained on {len(examples)} LLM-labelled tools ({len(model.categories)} categories)")
+    return model
@@ -0,0 +1,174 @@
+"""
+mock_upstream.py - Local stand-in for GitHub raw, the HF Spaces API and TAAFT
+Serves realistic fixture payloads at configurable sizes, latency and error rate,
+so scraper performance can be measured offline (see bench_scraper.py).
+Run: python mock_upstream.py  → serves on http://127.0.0.1:8765
+"""
+
+import hashlib
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+SECTIONS = ["Code Generation", "Image Generation", "Video Generation", "Audio & Speech",
+            "Data Analysis", "Writing & Content", "Automation & Agents", "Search & Research"]
+WORDS = ["AI", "powered", "tool", "that", "generates", "code", "images", "video", "voice", "text",
+         "for", "developers", "marketers", "teams", "with", "real-time", "collaboration", "and",
+         "automation", "analytics", "dashboards", "writing", "assistant", "models", "open-source"]
+
+
+def _sentence(rng: random.Random, n: int = 14) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(n)).capitalize() + "."
+
+
+def build_awesome_readme(items: int, seed: int = 0) -> str:
+    rng = random.Random(seed)
+    lines = ["# Awesome AI Tools (mock)", ""]
+    per_section = max(1, items // len(SECTIONS))
+    for i in range(items):
+        if i % per_section == 0:
+            lines += ["", f"## {SECTIONS[(i // per_section) % len(SECTIONS)]}", ""]
+        lines.append(f"- [Mock Tool {i}](https://tools.example/{i}) - {_sentence(rng)}")
+    return "\n".join(lines) + "\n"
+
+
+def build_spaces(count: int, seed: int = 0) -> List[Dict]:
+    rng = random.Random(seed + 1)
+    spaces = []
+    for i in range(count):
+        space = {
+            "id": f"mock-user-{i % 97}/mock-space-{i}",
+            "likes": count - i,
+            "lastModified": "2026-01-01T00:00:00.000Z",
+            "tags": rng.sample(["gradio", "streamlit", "text-generation", "image", "audio", "region:us"], 3),
+        }
+        if rng.random() < 0.7:
+            space["cardData"] = {"short_description": _sentence(rng, 10)}
+        spaces.append(space)
+    return spaces
+
+
+def build_taaft_html(cards: int, seed: int = 0) -> str:
+    rng = random.Random(seed + 2)
+    body = "\n".join(
+        f'<article class="tool-card"><h3>Listing Tool {i}</h3><p>{_sentence(rng)}</p></article>'
+        for i in range(cards)
+    )
+    return f"<html><head><title>Mock TAAFT</title></head><body><main>{body}</main></body></html>"
+
+
+class MockUpstream:
+    """Threaded HTTP server with the three mock sources. Use as a context manager."""
+
+    def __init__(self, awesome_items: int = 500, spaces: int = 1000, taaft_cards: int = 100,
+                 latency_ms: float = 50, error_rate: float = 0.0, port: int = 0, seed: int = 0):
+        self.latency = latency_ms / 1000
+        self.error_rate = error_rate
+        self.readme = build_awesome_readme(awesome_items, seed)
+        self.readme_etag = '"%s"' % hashlib.sha256(self.readme.encode()).hexdigest()[:16]
+        self.spaces = build_spaces(spaces, seed)
+        self.taaft_html = build_taaft_html(taaft_cards, seed)
+        self._rng = random.Random(seed)
+        self._rng_lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), self._handler_class())
+        self._server.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    @property
+    def awesome_url(self) -> str:
+        return f"{self.base_url}/awesome/README.md"
+
+    @property
+    def spaces_api(self) -> str:
+        return f"{self.base_url}/api/spaces"
+
+    @property
+    def taaft_url(self) -> str:
+        return f"{self.base_url}/taaft"
+
+    def _should_fail(self) -> bool:
+        with self._rng_lock:
+            return self._rng.random() < self.error_rate
+
+    def _handler_class(self):
+        upstream = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status: int, body: str = "", content_type: str = "text/plain", headers: Dict = None):
+                data = body.encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(data)))
+                for k, v in (headers or {}).items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                time.sleep(upstream.latency)
+                if upstream._should_fail():
+                    return self._send(503, "mock upstream error")
+
+                parts = urlsplit(self.path)
+                if parts.path == "/awesome/README.md":
+                    if self.headers.get("If-None-Match") == upstream.readme_etag:
+                        return self._send(304, headers={"ETag": upstream.readme_etag})
+                    return self._send(200, upstream.readme, "text/markdown", {"ETag": upstream.readme_etag})
+
+                if parts.path == "/api/spaces":
+                    query = parse_qs(parts.query)
+                    limit = int(query.get("limit", ["100"])[0])
+                    cursor = int(query.get("cursor", ["0"])[0])
+                    page = upstream.spaces[cursor:cursor + limit]
+                    headers = {}
+                    if cursor + limit < len(upstream.spaces):
+                        query["cursor"] = [str(cursor + limit)]
+                        next_url = f"{upstream.spaces_api}?{urlencode(query, doseq=True)}"
+                        headers["Link"] = f'<{next_url}>; rel="next"'
+                    return self._send(200, json.dumps(page), "application/json", headers)
+
+                if parts.path == "/taaft":
+                    return self._send(200, upstream.taaft_html, "text/html")
+
+                return self._send(404, "not found")
+
+        return Handler
+
+    def start(self) -> "MockUpstream":
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+if __name__ == "__main__":
+    server = MockUpstream(port=8765)
+    print(f"Mock upstream on {server.base_url}")
+    print(f"  {server.awesome_url}\n  {server.spaces_api}\n  {server.taaft_url}")
+    server.start()
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.stop()
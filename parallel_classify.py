@@ -0,0 +1,97 @@
+"""
+parallel_classify.py - Process-pool executor for the CPU-bound classification tiers
+Shards a tool list across worker processes for keyword scoring, label
+transfer and the local model (classifier.classify_without_llm), merges the
+results back in order, and routes the tools that still need the LLM to a
+separate asyncio stage that starts as soon as the first shard is done.
+Used by pipeline.process_tools() for large batches — replays and
+`python pipeline.py backfill` of archived scrape runs.
+"""
+
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from classifier import classification_text, classify_without_llm, keyword_classify_batch
+from llm_async import MAX_IN_FLIGHT
+
+CLASSIFY_WORKERS = max(1, (os.cpu_count() or 2) - 1)
+CLASSIFY_SHARD_SIZE = 2000        # tools per task — big enough to amortise IPC
+PARALLEL_MIN_TOOLS = 5000         # smaller batches aren't worth starting a pool for
+
+# Worker-process state, set once per worker by _init_worker
+_worker_tiers: Dict = {}
+
+
+def _init_worker(tiers: Dict):
+    global _worker_tiers
+    _worker_tiers = tiers
+
+
+def _classify_shard(shard: List[Dict], hints: List[Optional[str]], use_llm: bool) -> List[Tuple[Optional[Dict], Tuple[str, float], Dict]]:
+    """
+    Runs in a worker: batch keyword scoring + the no-LLM tiers for one shard.
+    Returns (result or None if the LLM must decide, keyword_result, category_scores) per tool.
+    """
+    texts = [classification_text(t["name"], t["description"], hint) for t, hint in zip(shard, hints)]
+    labels, confidences, category_scores = keyword_classify_batch(texts)
+    out = []
+    for tool, text, label, confidence, scores in zip(shard, texts, labels, confidences, category_scores):
+        keyword_result = (str(label), float(confidence))
+        result = classify_without_llm(tool["name"], tool["description"], keyword_result, text,
+                                      llm_available=use_llm, category_scores=scores, **_worker_tiers)
+        out.append((result, keyword_result, scores))
+    return out
+
+
+async def classify_parallel_async(tools: List[Dict], hints: List[Optional[str]], llm_classify: Callable,
+                                  use_llm: bool = True, workers: int = None, shard_size: int = None,
+                                  **tiers) -> List[Dict]:
+    """
+    Classify `tools` (with their category hints) across a process pool.
+    tiers (lazy_enrichment, local_fn, neighbour_fn) are pickled to each worker
+    once; tools that still need the LLM go through the coroutine
+    llm_classify(tool, keyword_result, category_scores), MAX_IN_FLIGHT at a time
+    (the Groq quota paces them further — see groq_quota.py).
+    Results come back in input order; CPU-tier results lack the per-tool
+    fields (name/description/source), which the caller adds.
+    """
+    loop = asyncio.get_running_loop()
+    shard_size = shard_size or CLASSIFY_SHARD_SIZE
+    results: List[Optional[Dict]] = [None] * len(tools)
+    llm_queue: asyncio.Queue = asyncio.Queue()
+
+    async def llm_stage():
+        while True:
+            item = await llm_queue.get()
+            if item is None:
+                return
+            i, keyword_result, category_scores = item
+            results[i] = await llm_classify(tools[i], keyword_result, category_scores)
+
+    with ProcessPoolExecutor(max_workers=workers or CLASSIFY_WORKERS, initializer=_init_worker, initargs=(tiers,)) as pool:
+        consumers = [asyncio.create_task(llm_stage()) for _ in range(MAX_IN_FLIGHT)]
+        starts = range(0, len(tools), shard_size)
+        shards = [
+            loop.run_in_executor(pool, _classify_shard, tools[s:s + shard_size], hints[s:s + shard_size], use_llm)
+            for s in starts
+        ]
+        try:
+            to_llm = 0
+            for n, (start, shard) in enumerate(zip(starts, shards)):
+                for offset, (result, keyword_result, category_scores) in enumerate(await shard):
+                    if result is None:
+                        to_llm += 1
+                        llm_queue.put_nowait((start + offset, keyword_result, category_scores))
+                    else:
+                        results[start + offset] = result
+                print(f"  [Parallel] shard {n + 1}/{len(shards)} done — {to_llm} tools routed to the LLM so far")
+            for _ in consumers:
+                llm_queue.put_nowait(None)
+            await asyncio.gather(*consumers)
+        finally:
+            for task in consumers:
+                task.cancel()
+
+    return results
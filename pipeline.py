@@ -5,48 +5,240 @@ Run manually or schedule with APScheduler
 """
 
 import asyncio
+from contextlib import nullcontext, suppress
 from datetime import datetime
-from scraper import scrape_all_sources, SAMPLE_TOOLS
-from classifier import hybrid_classify
+from typing import Optional
+from scraper import collect_tools, iter_all_sources, run_in_session_loop, SAMPLE_TOOLS
+from classifier import (classification_cache_key, classification_text, classifier_version,
+                        apply_llm_result, hybrid_classify_async, is_llm_labelled, keyword_classify_batch)
 from llm_engine import classify_and_enrich_tool, generate_trend_summary
-from database import init_db, save_tool, clear_tools, log_run, get_all_tools, get_tool_count
+from llm_async import AsyncGroqEngine
+from database import (init_db, save_tool, clear_tools, delete_tools, log_run, get_all_tools, get_tool_count,
+                      get_tool, get_pending_enrichment, update_tool_enrichment, get_llm_labelled_tools,
+                      get_cached_classifications, put_cached_classification, prune_classification_cache)
+from local_model import load_model, train_from_examples
+from label_transfer import build_index as build_neighbour_index
+from scrape_state import ScrapeState
+from parallel_classify import CLASSIFY_WORKERS, PARALLEL_MIN_TOOLS, classify_parallel_async
 
+# Classification cache (classification_cache table)
+CLASSIFICATION_CACHE_TTL = 30 * 24 * 3600     # seconds before a cached result is re-derived
+CLASSIFICATION_CACHE_MAX_ENTRIES = 50_000     # least recently used beyond this are evicted
 
-def process_tools(raw_tools: list, use_llm: bool = True) -> list:
-    """Classify and enrich each tool."""
-    enriched = []
+# Live/replay streams are classified in micro-batches (see process_tool_stream)
+STREAM_BATCH_SIZE = 64          # tools per cache lookup + keyword_classify_batch() call
+STREAM_BATCH_WAIT = 0.2         # seconds a batch waits to fill once its first tool arrives
 
-    for i, tool in enumerate(raw_tools):
-        print(f"  [{i+1}/{len(raw_tools)}] Processing: {tool['name']}")
 
-        llm_fn = classify_and_enrich_tool if use_llm else None
+def _category_hint(tool: dict):
+    # Awesome-list section + homepage <meta keywords> both count as hints
+    return " ".join(filter(None, [tool.get("category_hint"), tool.get("homepage_keywords")])) or None
 
-        result = hybrid_classify(
-            name=tool["name"],
-            description=tool["description"],
-            llm_fn=llm_fn,
+
+def _cache_key(tool: dict) -> str:
+    return classification_cache_key(tool["name"], tool["description"], _category_hint(tool))
+
+
+# Per-tool fields, never part of a (cached) classification result
+TOOL_FIELDS = ("name", "description", "source", "category_hint")
+# tools-table bookkeeping columns, dropped when a stored row is cached as a result
+ROW_FIELDS = ("id", "scraped_at", "classifier_version")
+
+
+def _with_tool_fields(result: dict, tool: dict) -> dict:
+    result["name"] = tool["name"]
+    result["description"] = tool["description"]
+    result["source"] = tool.get("source", "Unknown")
+    result["category_hint"] = _category_hint(tool)
+    return result
+
+
+def _cache_result(key: str, result: dict):
+    """
+    Only LLM-backed results are worth caching (classifier.is_llm_labelled):
+    keyword-only and pending ones are cheap to redo, and would hide a later LLM result.
+    """
+    if is_llm_labelled(result):
+        put_cached_classification(key, classifier_version(),
+                                  {k: v for k, v in result.items() if k not in TOOL_FIELDS})
+
+
+async def classify_tool_async(tool: dict, engine: Optional[AsyncGroqEngine], keyword_result: tuple = None,
+                              category_scores: dict = None, **tiers) -> dict:
+    """
+    Classify and enrich a single scraped tool, its LLM call scheduled by engine
+    (None = keyword/local tiers only). tiers are passed on to hybrid_classify_async
+    (lazy_enrichment, local_fn, neighbour_fn).
+    """
+    result = await hybrid_classify_async(
+        name=tool["name"],
+        description=tool["description"],
+        llm_fn=engine.classify_and_enrich if engine else None,
+        category_hint=_category_hint(tool),
+        keyword_result=keyword_result,
+        category_scores=category_scores,
+        **tiers,
+    )
+    return _with_tool_fields(result, tool)
+
+
+def _groq_engine(use_llm: bool):
+    """`async with` this: a fresh AsyncGroqEngine for the running loop, or None in keyword-only mode."""
+    return AsyncGroqEngine() if use_llm else nullcontext()
+
+
+def process_tools(raw_tools: list, use_llm: bool = True, parallel: bool = None, **tiers) -> list:
+    """
+    Classify and enrich each tool. Results cached from earlier runs are used
+    as-is; keyword scoring runs once for the whole batch of cache misses.
+    LLM calls overlap as far as the Groq quota allows (llm_async.py).
+    Large batches (PARALLEL_MIN_TOOLS+ misses on a multi-core machine, or
+    parallel=True) run the CPU tiers across a process pool — see parallel_classify.py.
+    """
+    keys = [_cache_key(t) for t in raw_tools]
+    cached = get_cached_classifications(keys, CLASSIFICATION_CACHE_TTL)
+    misses = [i for i, key in enumerate(keys) if key not in cached]
+    print(f"      → {len(raw_tools) - len(misses)} cached classifications, {len(misses)} to classify")
+
+    miss_tools = [raw_tools[i] for i in misses]
+    if parallel or (parallel is None and CLASSIFY_WORKERS > 1 and len(misses) >= PARALLEL_MIN_TOOLS):
+        results = asyncio.run(_classify_parallel(miss_tools, use_llm, tiers))
+    else:
+        results = asyncio.run(_classify_batch(miss_tools, use_llm, tiers))
+    for i, result in zip(misses, results):
+        _cache_result(keys[i], result)
+        cached[keys[i]] = result
+    return [_with_tool_fields(dict(cached[key]), tool) for key, tool in zip(keys, raw_tools)]
+
+
+async def _classify_batch(tools: list, use_llm: bool, tiers: dict) -> list:
+    labels, confidences, category_scores = keyword_classify_batch(
+        [classification_text(t["name"], t["description"], _category_hint(t)) for t in tools]
+    )
+    done = 0
+
+    async def classify(tool, label, confidence, scores):
+        nonlocal done
+        result = await classify_tool_async(tool, engine, (str(label), float(confidence)), scores, **tiers)
+        done += 1
+        print(f"  [{done}/{len(tools)}] {tool['name']}: {result['category']} ({result['classification_method']})")
+        return result
+
+    async with _groq_engine(use_llm) as engine:
+        return await asyncio.gather(*map(classify, tools, labels, confidences, category_scores))
+
+
+async def _classify_parallel(tools: list, use_llm: bool, tiers: dict) -> list:
+    async with _groq_engine(use_llm) as engine:
+        return await classify_parallel_async(
+            tools, [_category_hint(t) for t in tools],
+            lambda tool, keyword_result, category_scores: classify_tool_async(tool, engine, keyword_result,
+                                                                              category_scores, **tiers),
+            use_llm, **tiers,
         )
 
-        # Small delay to avoid Groq TPM rate limit (6000 tokens/min on free tier)
-        if use_llm:
-            import time
-            time.sleep(0.8)
 
-        result["name"] = tool["name"]
-        result["description"] = tool["description"]
-        result["source"] = tool.get("source", "Unknown")
-        enriched.append(result)
+async def process_tool_stream(tool_stream, use_llm: bool = True, **tiers) -> list:
+    """
+    Classify tools as they arrive from an async iterator (e.g. iter_all_sources()).
+    Arrivals are grouped into micro-batches (up to STREAM_BATCH_SIZE tools, or
+    whatever came within STREAM_BATCH_WAIT seconds) for one cache lookup and
+    one keyword_classify_batch() call. Each cache miss becomes a task; the
+    ones that need the LLM wait on the shared Groq quota while scrapers keep
+    fetching and later tools are scored, so several Groq calls overlap.
+    A record yielded again (same record_id: a late near-duplicate was merged
+    into it) replaces the earlier one, and is only re-classified if the text
+    it is classified by changed.
+    """
+    async def classify(key, tool, keyword_result, category_scores):
+        result = await classify_tool_async(tool, engine, keyword_result, category_scores, **tiers)
+        _cache_result(key, result)
+        return result
+
+    # record_id → [latest tool, cache key, result or task still classifying it], in first-seen order
+    records = {}
+    async with _groq_engine(use_llm) as engine:
+        async for batch in _micro_batches(tool_stream, STREAM_BATCH_SIZE, STREAM_BATCH_WAIT):
+            keys = [_cache_key(t) for t in batch]
+            cached = get_cached_classifications(keys, CLASSIFICATION_CACHE_TTL)
+            misses = [(key, tool) for key, tool in zip(keys, batch) if key not in cached]
+            labels, confidences, category_scores = keyword_classify_batch(
+                [classification_text(t["name"], t["description"], _category_hint(t)) for _, t in misses]
+            )
+            scored = {key: ((str(label), float(confidence)), scores)
+                      for (key, _), label, confidence, scores in zip(misses, labels, confidences, category_scores)}
+            for key, tool in zip(keys, batch):
+                record = records.get(tool.get("record_id", id(tool)))
+                if record is not None and record[1] == key:
+                    record[0] = tool        # merged, but classified by the same text
+                    continue
+                if record is None:
+                    print(f"  [{len(records) + 1}] Processing: {tool['name']}")
+                else:
+                    print(f"  Re-classifying after a merge: {tool['name']}")
+                    if isinstance(record[2], asyncio.Task):
+                        record[2].cancel()
+                result = cached[key] if key in cached else asyncio.create_task(classify(key, tool, *scored[key]))
+                records[tool.get("record_id", id(tool))] = [tool, key, result]
+        return [_with_tool_fields(dict(await r if isinstance(r, asyncio.Task) else r), tool)
+                for tool, _, r in records.values()]
+
+
+async def _micro_batches(stream, size: int, wait: float):
+    """Lists of up to `size` items from an async iterator, each cut off `wait` seconds after its first item."""
+    queue: asyncio.Queue = asyncio.Queue()
+    done = object()
+
+    async def pump():
+        try:
+            async for item in stream:
+                queue.put_nowait(item)
+        finally:
+            queue.put_nowait(done)
 
-    return enriched
+    # The iterator is drained by its own task: timing out a queue.get() is
+    # safe, timing out the iterator's __anext__ would close the generator
+    task = asyncio.create_task(pump())
+    try:
+        finished = False
+        while not finished:
+            item = await queue.get()
+            if item is done:
+                break
+            batch = [item]
+            deadline = asyncio.get_running_loop().time() + wait
+            while len(batch) < size:
+                try:
+                    item = await asyncio.wait_for(queue.get(), deadline - asyncio.get_running_loop().time())
+                except TimeoutError:
+                    break
+                if item is done:
+                    finished = True
+                    break
+                batch.append(item)
+            yield batch
+        await task      # re-raises the iterator's error, if any
+    finally:
+        if not task.done():
+            task.cancel()
+            with suppress(asyncio.CancelledError):
+                await task
 
 
-def run_pipeline(use_sample_data: bool = False, use_llm: bool = True):
+def run_pipeline(use_sample_data: bool = False, use_llm: bool = True, replay_run: str = None, enrich_homepages: bool = False,
+                 incremental: bool = False, lazy_enrichment: bool = False):
     """
     Full pipeline run:
-    1. Scrape (or use sample data)
-    2. Classify + enrich
-    3. Save to DB
-    4. Generate trend summary
+    1. Scrape (or use sample data, or replay an archived scrape run offline),
+       optionally enriching thin descriptions from each tool's homepage
+    2. Classify + enrich — cached results for unchanged tools, then labels
+       copied from near-identical enriched tools, then keywords, then the
+       local model, then the LLM (lazy_enrichment: confident keyword hits
+       skip the LLM too; both are queued for enrich_pending_tools())
+    3. Save to DB — incremental runs only classify new/changed tools and
+       delete tombstoned ones instead of rebuilding the whole table
+    4. Retrain the local model on the LLM labels now in the DB
+    5. Generate trend summary
     """
     print(f"\n{'='*50}")
     print(f"AI Tool TrendAnalyzer Pipeline")
@@ -54,31 +246,76 @@ def run_pipeline(use_sample_data: bool = False, use_llm: bool = True):
     print(f"{'='*50}\n")
 
     init_db()
+    evicted = prune_classification_cache(classifier_version(), CLASSIFICATION_CACHE_TTL, CLASSIFICATION_CACHE_MAX_ENTRIES)
+    if evicted:
+        print(f"[Pipeline] Evicted {evicted} stale classification cache entries")
+    state = ScrapeState() if incremental and not use_sample_data else None
+    local_model = load_model()
+    # Built before this run replaces the table, so last run's labels carry over
+    neighbours = build_neighbour_index(get_all_tools(), classifier_version())
+    print(f"[Pipeline] Label transfer index: {len(neighbours)} enriched tools")
+    tiers = {
+        "lazy_enrichment": lazy_enrichment,
+        "local_fn": local_model.predict if local_model else None,
+        "neighbour_fn": neighbours.transfer,
+    }
 
-    # Step 1: Scrape
+    # Step 1 + 2: Scrape and classify — live tools are classified as they stream in
     if use_sample_data:
-        print("[1/4] Using sample data (offline mode)...")
-        raw_tools = SAMPLE_TOOLS
+        print("[1/5] Using sample data (offline mode)...")
+        print(f"      → {len(SAMPLE_TOOLS)} tools collected\n")
+        print(f"[2/5] Classifying tools with Groq LLM...")
+        enriched_tools = process_tools(SAMPLE_TOOLS, use_llm=use_llm, **tiers)
+    elif replay_run:
+        # Offline: the archive parses in one go, so classify it as a batch (process pool when large)
+        print(f"[1/5] Replaying archived scrape run '{replay_run}'...")
+        raw_tools = _replay_tools(replay_run, enrich_homepages, state)
+        print(f"      → {len(raw_tools)} tools collected\n")
+        print(f"[2/5] Classifying tools with Groq LLM...")
+        enriched_tools = process_tools(raw_tools, use_llm=use_llm, **tiers)
     else:
-        print("[1/4] Scraping live sources...")
-        raw_tools = asyncio.run(scrape_all_sources())
-
-    print(f"      → {len(raw_tools)} tools collected\n")
-
-    # Step 2: Classify + enrich with LLM
-    print(f"[2/4] Classifying tools with Groq LLM...")
-    enriched_tools = process_tools(raw_tools, use_llm=use_llm)
+        print("[1-2/5] Scraping live sources + classifying tools with Groq LLM as they arrive...")
+        enriched_tools = run_in_session_loop(process_tool_stream(iter_all_sources(enrich=enrich_homepages, state=state),
+                                                                 use_llm=use_llm, **tiers))
     print(f"      → {len(enriched_tools)} tools classified\n")
+    transferred = sum(1 for t in enriched_tools if t.get("classification_method") == "neighbour")
+    if transferred:
+        print(f"      → {transferred} labelled from near-identical enriched tools (no LLM call)\n")
+    local = sum(1 for t in enriched_tools if t.get("classification_method") == "local_model")
+    if local:
+        print(f"      → {local} classified by the local model (no LLM call)\n")
+    failed = sum(1 for t in enriched_tools if t.get("llm_failed"))
+    if failed:
+        print(f"      → {failed} Groq calls failed — keyword category kept, queued for enrichment\n")
+    pending = sum(1 for t in enriched_tools if t.get("enrichment_status") == "pending") - failed
+    if pending:
+        print(f"      → {pending} tools queued for lazy LLM enrichment\n")
 
     # Step 3: Save to DB
-    print("[3/4] Saving to database...")
-    clear_tools()  # Fresh run
-    for tool in enriched_tools:
-        save_tool(tool)
+    print("[3/5] Saving to database...")
+    if state is not None:
+        removed = state.tombstones()
+        delete_tools([t["name"] for t in removed] + [t["name"] for t in enriched_tools])
+        print(f"      → {len(removed)} removed tools deleted")
+    else:
+        clear_tools()  # Fresh run
+    _save_results(enriched_tools)
+    if state is not None:
+        state.commit()  # only now — a crash before this re-processes the same changes next run
     print(f"      → {get_tool_count()} tools saved\n")
 
-    # Step 4: Trend summary
-    print("[4/4] Generating AI trend summary...")
+    # Step 4: Retrain the local tier on everything the LLM has labelled so far
+    print("[4/5] Retraining local classifier...")
+    if use_llm:
+        train_from_examples([
+            {"text": classification_text(t["name"], t["description"] or "", t["category_hint"]), "category": t["category"]}
+            for t in get_llm_labelled_tools()
+        ])
+    else:
+        print("      → skipped (no new LLM labels in keyword-only mode)")
+
+    # Step 5: Trend summary
+    print("[5/5] Generating AI trend summary...")
     all_tools = get_all_tools()
     trend = generate_trend_summary(all_tools)
     print(f"\n📊 TREND SUMMARY:\n{trend}\n")
@@ -92,6 +329,115 @@ def run_pipeline(use_sample_data: bool = False, use_llm: bool = True):
     return enriched_tools
 
 
+def _replay_tools(run_id: str, enrich: bool = False, state: ScrapeState = None) -> list:
+    """All tools from an archived scrape run, re-parsed offline (deduped as in a live run)."""
+    return run_in_session_loop(collect_tools(iter_all_sources(replay_run=run_id, enrich=enrich, state=state)))
+
+
+def backfill_run(run_id: str = "latest", use_llm: bool = True, lazy_enrichment: bool = False) -> list:
+    """
+    Re-classify every tool of an archived scrape run (e.g. after a prompt,
+    rules or model change) and replace their rows in place — tools from
+    other runs are kept. Goes through process_tools(), so a big run is
+    spread across the process pool (parallel_classify.py).
+    Run: `python pipeline.py backfill [run_id] [nokw] [lazy]`
+    """
+    init_db()
+    local_model = load_model()
+    tiers = {
+        "lazy_enrichment": lazy_enrichment,
+        "local_fn": local_model.predict if local_model else None,
+        "neighbour_fn": build_neighbour_index(get_all_tools(), classifier_version()).transfer,
+    }
+    raw_tools = _replay_tools(run_id)
+    print(f"[Backfill] {len(raw_tools)} tools in archived run '{run_id}'")
+    enriched_tools = process_tools(raw_tools, use_llm=use_llm, **tiers)
+    delete_tools([t["name"] for t in enriched_tools])
+    _save_results(enriched_tools)
+    log_run(len(enriched_tools), "backfill")
+    print(f"[Backfill] {len(enriched_tools)} tools re-classified, {get_tool_count()} in the database")
+    return enriched_tools
+
+
+def _save_results(tools: list):
+    version = classifier_version()
+    for tool in tools:
+        save_tool(dict(tool, classifier_version=version))
+
+
+def enrich_tool_record(tool: dict) -> dict:
+    """Fill a pending tool's summary/tags/audience_fit/pricing from the LLM and store them."""
+    return _store_enrichment(tool, classify_and_enrich_tool(tool["name"], tool["description"] or ""))
+
+
+def _store_enrichment(tool: dict, enrichment: dict) -> dict:
+    """Store a real LLM reply; a failed call leaves the tool untouched and still pending."""
+    if enrichment.get("llm_failed"):
+        return tool
+    method = None
+    if tool.get("classification_method") == "keyword_fallback":
+        # Its LLM call failed during the run: settle category + method as that call would have
+        result = apply_llm_result(dict(enrichment), (tool["category"], tool.get("keyword_confidence") or 0.0),
+                                  tool.get("category_scores", {}))
+        category, method = result["category"], result["classification_method"]
+        enrichment.pop("category", None)
+    else:
+        category = enrichment.pop("category", None)
+        # Keep the confident keyword category — unless the tool is multi-label and
+        # the LLM picked another of its keyword categories as the primary one
+        if tool.get("classification_method") != "keyword_multi" or category not in tool.get("category_scores", {}):
+            category = None
+    update_tool_enrichment(tool["id"], enrichment, category, method)
+    tool.update(enrichment, enrichment_status="done")
+    if category:
+        tool["category"] = category
+    if method:
+        tool["classification_method"] = method
+    # Cache the finished result like an eager one — rows are rebuilt every full
+    # run, and only the cache spares the next run this tool's Groq call
+    if tool.get("classifier_version") == classifier_version():
+        _cache_result(_cache_key(tool), {k: v for k, v in tool.items() if k not in ROW_FIELDS})
+    return tool
+
+
+def enrich_pending_tools(limit: int = None) -> int:
+    """
+    Background half of lazy enrichment: drain the queue of keyword-only tools,
+    as many Groq calls at once as the quota allows.
+    Run after a lazy pipeline run, from the scheduler, or `python pipeline.py enrich-pending [N]`.
+    Returns how many were enriched; tools whose Groq call failed stay queued.
+    """
+    pending = get_pending_enrichment(limit)
+    print(f"[Enrich] {len(pending)} tools pending LLM enrichment")
+
+    async def enrich_all() -> int:
+        done = enriched = 0
+
+        async def enrich(tool):
+            nonlocal done, enriched
+            tool = _store_enrichment(tool, await engine.classify_and_enrich(tool["name"], tool["description"] or ""))
+            done += 1
+            if tool["enrichment_status"] == "done":
+                enriched += 1
+                print(f"  [{done}/{len(pending)}] Enriched: {tool['name']}")
+            else:
+                print(f"  [{done}/{len(pending)}] Groq call failed, still pending: {tool['name']}")
+
+        async with AsyncGroqEngine() as engine:
+            await asyncio.gather(*map(enrich, pending))
+        return enriched
+
+    return asyncio.run(enrich_all())
+
+
+def get_tool_enriched(tool_id: int):
+    """On-demand half of lazy enrichment: a tool, enriched first if still pending."""
+    tool = get_tool(tool_id)
+    if tool and tool.get("enrichment_status") == "pending":
+        tool = enrich_tool_record(tool)
+    return tool
+
+
 if __name__ == "__main__":
     import sys
 
@@ -99,8 +445,34 @@ if __name__ == "__main__":
     #   python pipeline.py          → scrape live + use LLM
     #   python pipeline.py sample   → use sample data + use LLM
     #   python pipeline.py sample nokw → sample data, keyword only (no LLM)
+    #   python pipeline.py replay [run_id] nokw → re-parse an archived scrape run offline
+    #   python pipeline.py enrich       → also fetch homepage metadata for thin descriptions
+    #   python pipeline.py incremental  → only classify new/changed tools, drop removed ones
+    #   python pipeline.py lazy         → confident keyword hits skip the LLM (enriched later)
+    #   python pipeline.py enrich-pending [N] → LLM-enrich up to N queued tools
+    #   python pipeline.py backfill [run_id] nokw → re-classify an archived run in place (process pool)
+
+    if "enrich-pending" in sys.argv:
+        init_db()
+        args = sys.argv[sys.argv.index("enrich-pending") + 1:]
+        enrich_pending_tools(int(args[0]) if args and args[0].isdigit() else None)
+        sys.exit(0)
+
+    if "backfill" in sys.argv:
+        args = sys.argv[sys.argv.index("backfill") + 1:]
+        run_id = args[0] if args and args[0] not in ("nokw", "lazy") else "latest"
+        backfill_run(run_id, use_llm="nokw" not in sys.argv, lazy_enrichment="lazy" in sys.argv)
+        sys.exit(0)
 
     use_sample = "sample" in sys.argv
     use_llm = "nokw" not in sys.argv
+    enrich = "enrich" in sys.argv
+    incremental = "incremental" in sys.argv
+    lazy = "lazy" in sys.argv
+    replay_run = None
+    if "replay" in sys.argv:
+        args = sys.argv[sys.argv.index("replay") + 1:]
+        replay_run = args[0] if args and args[0] not in ("nokw", "enrich", "incremental", "lazy") else "latest"
 
-    run_pipeline(use_sample_data=use_sample, use_llm=use_llm)
+    run_pipeline(use_sample_data=use_sample, use_llm=use_llm, replay_run=replay_run, enrich_homepages=enrich,
+                 incremental=incremental, lazy_enrichment=lazy)
@@ -0,0 +1,89 @@
+"""
+scrape_state.py - Per-source high-water marks for incremental scraping
+Remembers a fingerprint of every tool each source listed last run (HF space
+id + lastModified, hash of each awesome-list entry, ...), so a run can pass on
+only new/changed tools plus tombstones for the ones that disappeared.
+State is persisted to SCRAPE_STATE_PATH, but only when the caller commit()s —
+after the run's results are safely stored.
+"""
+
+import hashlib
+import json
+import os
+from typing import Dict, List, Set
+
+from dedup import normalize_name
+
+SCRAPE_STATE_PATH = "scrape_state.json"
+
+
+def tool_key(tool: Dict) -> str:
+    """Stable identity of a listing: its URL (HF space id, awesome link) or normalized name."""
+    return tool.get("url") or normalize_name(tool["name"])
+
+
+def fingerprint(tool: Dict) -> str:
+    """Changes whenever anything the classifier reads (or HF's lastModified) changes."""
+    fields = [tool.get(k) for k in ("name", "description", "category_hint", "last_modified")]
+    return hashlib.blake2b(json.dumps(fields).encode("utf-8"), digest_size=8).hexdigest()
+
+
+class ScrapeState:
+    """
+    observe() each tool a source yields; it returns True when the tool is new
+    or changed since the last committed run. Sources that finished cleanly are
+    mark_complete()d — only those can produce tombstones, so a timed-out source
+    never "removes" the tools it didn't get to.
+    """
+
+    def __init__(self, path: str = SCRAPE_STATE_PATH):
+        self.path = path
+        self._saved: Dict[str, Dict[str, Dict]] = {}
+        self._seen: Dict[str, Dict[str, Dict]] = {}
+        self._complete: Set[str] = set()
+        try:
+            with open(path, encoding="utf-8") as f:
+                self._saved = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            self._saved = {}
+
+    def observe(self, source: str, tool: Dict) -> bool:
+        key = tool_key(tool)
+        fp = fingerprint(tool)
+        self._seen.setdefault(source, {})[key] = {"fp": fp, "name": tool["name"]}
+        previous = self._saved.get(source, {}).get(key)
+        return previous is None or previous["fp"] != fp
+
+    def mark_complete(self, source: str):
+        self._complete.add(source)
+
+    def tombstones(self) -> List[Dict]:
+        """Tools listed last run but gone from a source that completed this run."""
+        # A tool that merely moved (new URL, or now deduped into another source) is still live
+        live_names = {normalize_name(e["name"]) for seen in self._seen.values() for e in seen.values()}
+        removed = []
+        for source in self._complete:
+            seen = self._seen.get(source, {})
+            for key, entry in self._saved.get(source, {}).items():
+                if key not in seen and normalize_name(entry["name"]) not in live_names:
+                    removed.append({"source": source, "key": key, "name": entry["name"]})
+        return removed
+
+    def commit(self):
+        """Persist this run: complete sources are replaced, partial ones only extended."""
+        data = dict(self._saved)
+        for source, seen in self._seen.items():
+            data[source] = seen if source in self._complete else {**self._saved.get(source, {}), **seen}
+        for source in self._complete - set(self._seen):
+            data[source] = {}
+        tmp = f"{self.path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(tmp, self.path)
+        self._saved = data
+
+
+if __name__ == "__main__":
+    state = ScrapeState()
+    for source, entries in state._saved.items():
+        print(f"  {source}: {len(entries)} tools tracked")
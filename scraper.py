@@ -7,14 +7,26 @@ Uses RELIABLE, publicly scrapeable sources:
 """
 
 import asyncio
+import atexit
+import contextlib
+import json
 import re
+import threading
+import time
 import httpx
-from bs4 import BeautifulSoup
-from typing import List, Dict
+from urllib.parse import urlencode, urlsplit
+from typing import AsyncIterator, List, Dict, Optional, Tuple
+
+import archive
+from dedup import GENERATED_DESC_PREFIXES, NearDuplicateIndex, merge_into
+from host_guard import PAGE_HOST_STATE_PATH, HostGuard
+from scrape_state import ScrapeState
+import html_parser
+import http_cache
 
 # Playwright optional — not available on Streamlit Cloud
 try:
-    from playwright.async_api import async_playwright
+    from playwright.async_api import async_playwright, TimeoutError as PlaywrightTimeoutError
     PLAYWRIGHT_AVAILABLE = True
 except ImportError:
     PLAYWRIGHT_AVAILABLE = False
@@ -55,153 +67,1028 @@ SAMPLE_TOOLS = [
 ]
 
 
-# ── Source 1: GitHub Awesome List (most reliable — plain markdown) ───────────
-async def scrape_github_awesome_list() -> List[Dict]:
+# ── Shared HTTP session (one pooled client for every source) ────────────────
+HTTP_TIMEOUT = 15
+HTTP_MAX_CONNECTIONS = 20
+HTTP_MAX_KEEPALIVE = 10        # idle keep-alive connections kept per pool
+HTTP_KEEPALIVE_EXPIRY = 60     # seconds an idle connection stays open
+
+# HTTP/2 needs the optional `h2` package (pip install httpx[http2])
+try:
+    import h2  # noqa: F401
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+class ScraperSession:
     """
-    Scrapes the curated 'Awesome AI Tools' GitHub README.
-    GitHub raw markdown is always accessible — no JS, no auth, no blocking.
+    Owns one pooled httpx.AsyncClient shared by all scrapers, so DNS/TCP/TLS
+    handshakes are paid once per host and connections are kept alive.
+    The client belongs to the event loop it was built on: runs driven through
+    run_in_session_loop() all share that loop, so its keep-alive connections
+    (and the browser) carry over from one run to the next. Used from another
+    loop (a bare asyncio.run()), it's rebuilt there and closed when that run's
+    iter_all_sources() ends.
     """
-    url = "https://raw.githubusercontent.com/mahseema/awesome-ai-tools/main/README.md"
-    tools = []
 
+    def __init__(
+        self,
+        max_connections: int = HTTP_MAX_CONNECTIONS,
+        max_keepalive: int = HTTP_MAX_KEEPALIVE,
+        keepalive_expiry: float = HTTP_KEEPALIVE_EXPIRY,
+        timeout: float = HTTP_TIMEOUT,
+        http2: bool = HTTP2_AVAILABLE,
+        replay_run: str = None,
+    ):
+        self.limits = httpx.Limits(
+            max_connections=max_connections,
+            max_keepalive_connections=max_keepalive,
+            keepalive_expiry=keepalive_expiry,
+        )
+        self.timeout = timeout
+        self.http2 = http2 and HTTP2_AVAILABLE
+        self._client: Optional[httpx.AsyncClient] = None
+        self._loop = None
+        self.browser = BrowserPool()
+        # Raw payload archive: archive_run records live payloads while set;
+        # replay serves a past run's payloads instead of touching the network.
+        self.archive_run: Optional[archive.ArchiveRun] = None
+        self.replay: Optional[archive.ReplayArchive] = archive.load_run(replay_run) if replay_run else None
+        self.guard = HostGuard()
+        self.page_guard = HostGuard(PAGE_HOST_STATE_PATH)   # homepage enrichment only
+        # Sources that swallowed an error this run — their listing is partial,
+        # so incremental runs must not tombstone what they didn't get to
+        self.partial_sources: set = set()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        if self.replay is not None:
+            return ReplayClient(self.replay)
+        loop = asyncio.get_running_loop()
+        if self._client is None or self._client.is_closed or self._loop is not loop:
+            # A client from another loop can't be used here — its sockets belong to that loop
+            if self._client is not None and not self._client.is_closed:
+                _close_on_loop(self._loop, self._client.aclose)
+            self._client = httpx.AsyncClient(
+                timeout=self.timeout,
+                limits=self.limits,
+                http2=self.http2,
+                follow_redirects=True,
+            )
+            self._loop = loop
+        return self._client
+
+    @property
+    def use_http_cache(self) -> bool:
+        """Replayed payloads must never overwrite the live conditional-fetch cache."""
+        return self.replay is None
+
+    def record_payload(self, source: str, url: str, body: Optional[str], next_url: str = None):
+        """Archive a raw payload if this run is being archived."""
+        if self.archive_run is not None and body is not None:
+            self.archive_run.record(source, url, body, next_url=next_url)
+
+    async def aclose(self):
+        if self._client is not None and not self._client.is_closed:
+            await self._client.aclose()
+        self._client = None
+        self._loop = None
+        await self.browser.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        await self.aclose()
+
+
+def _close_on_loop(loop: Optional[asyncio.AbstractEventLoop], aclose):
+    """Close something owned by another event loop, on that loop, if it's still running."""
+    if loop is not None and loop.is_running() and not loop.is_closed():
+        asyncio.run_coroutine_threadsafe(aclose(), loop)
+
+
+# ── Offline replay (serves archived payloads through the httpx interface) ───
+class _ReplayResponse:
+    def __init__(self, body: Optional[str], next_url: Optional[str]):
+        self.status_code = 200 if body is not None else 404
+        self.text = body or ""
+        self.headers: Dict = {}
+        self.links = {"next": {"url": next_url}} if next_url else {}
+        self.encoding = "utf-8"
+
+    async def aiter_lines(self):
+        for line in self.text.splitlines():
+            yield line
+
+    async def aiter_bytes(self):
+        yield self.text.encode("utf-8")
+
+
+class ReplayClient:
+    """Stand-in for httpx.AsyncClient that answers from an archived run (404 if absent)."""
+
+    def __init__(self, replay: archive.ReplayArchive):
+        self.replay = replay
+
+    async def get(self, url: str, headers: Dict = None) -> _ReplayResponse:
+        return _ReplayResponse(self.replay.body(url), self.replay.next_url(url))
+
+    @contextlib.asynccontextmanager
+    async def stream(self, method: str, url: str, headers: Dict = None):
+        yield await self.get(url)
+
+
+# ── Browser pool (one Chromium kept alive, pages handed out as tabs) ────────
+BROWSER_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36"
+BROWSER_MAX_PAGES = 4          # parallel tabs
+
+
+class BrowserPool:
+    """
+    Launches Chromium once and keeps one context alive across runs on the
+    session loop (see run_in_session_loop); callers borrow tabs with
+    `async with pool.page() as page`. Like ScraperSession's client, the
+    browser belongs to its event loop: used from another loop, the old one
+    is closed and Chromium relaunched.
+    """
+
+    def __init__(self, max_pages: int = BROWSER_MAX_PAGES):
+        self.max_pages = max_pages
+        self._playwright = None
+        self._browser = None
+        self._context = None
+        self._loop = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._slots: Optional[asyncio.Semaphore] = None
+
+    async def _ensure(self):
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # Objects from another loop are unusable here — close them there
+            if self._browser is not None:
+                _close_on_loop(self._loop, self._close_browser(self._playwright, self._browser))
+            self._playwright = self._browser = self._context = None
+            self._lock = asyncio.Lock()
+            self._slots = asyncio.Semaphore(self.max_pages)
+            self._loop = loop
+
+        async with self._lock:
+            if self._browser is not None and self._browser.is_connected():
+                return
+            if self._playwright is None:
+                self._playwright = await async_playwright().start()
+            self._browser = await self._playwright.chromium.launch(headless=True)
+            self._context = await self._browser.new_context(
+                user_agent=BROWSER_USER_AGENT,
+                viewport={"width": 1280, "height": 800},
+            )
+            await self._context.route("**/*.{png,jpg,jpeg,gif,webp,woff,woff2}", lambda r: r.abort())
+
+    @contextlib.asynccontextmanager
+    async def page(self):
+        await self._ensure()
+        async with self._slots:
+            page = await self._context.new_page()
+            try:
+                yield page
+            finally:
+                await page.close()
+
+    @staticmethod
+    def _close_browser(playwright, browser):
+        async def close():
+            if browser is not None:
+                with contextlib.suppress(Exception):
+                    await browser.close()
+            if playwright is not None:
+                with contextlib.suppress(Exception):
+                    await playwright.stop()
+        return close
+
+    async def aclose(self):
+        close = self._close_browser(self._playwright, self._browser)
+        if self._loop is not None and self._loop is not asyncio.get_running_loop():
+            _close_on_loop(self._loop, close)
+        else:
+            await close()
+        self._playwright = self._browser = self._context = self._loop = None
+
+
+_shared_session: Optional[ScraperSession] = None
+
+
+def get_session() -> ScraperSession:
+    """Process-wide session, reused by every pipeline run in a long-lived process."""
+    global _shared_session
+    if _shared_session is None:
+        _shared_session = ScraperSession()
+    return _shared_session
+
+
+# ── Session loop (one long-lived event loop shared by every pipeline run) ───
+_session_loop: Optional[asyncio.AbstractEventLoop] = None
+_session_loop_lock = threading.Lock()
+
+
+def _get_session_loop() -> asyncio.AbstractEventLoop:
+    global _session_loop
+    with _session_loop_lock:
+        if _session_loop is None or _session_loop.is_closed():
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="scraper-session-loop", daemon=True).start()
+            atexit.register(_stop_session_loop, loop)
+            _session_loop = loop
+        return _session_loop
+
+
+def _stop_session_loop(loop: asyncio.AbstractEventLoop):
+    if _shared_session is not None:
+        with contextlib.suppress(Exception):
+            asyncio.run_coroutine_threadsafe(_shared_session.aclose(), loop).result(timeout=10)
+    loop.call_soon_threadsafe(loop.stop)
+
+
+def in_session_loop() -> bool:
+    """True when called from a coroutine (or callback) running on the session loop."""
     try:
-        async with httpx.AsyncClient(timeout=15) as client:
-            resp = await client.get(url)
-            if resp.status_code != 200:
+        return _session_loop is not None and asyncio.get_running_loop() is _session_loop
+    except RuntimeError:
+        return False
+
+
+def run_in_session_loop(coro):
+    """
+    Run a coroutine on the process-wide session loop (a daemon thread started
+    on first use) and block until it returns — asyncio.run() for pipeline runs.
+    get_session()'s pooled client and Chromium live on that loop, so a
+    long-lived process (dashboard, scheduler, API) reuses them run after run.
+    The session is closed at interpreter exit.
+    """
+    loop = _get_session_loop()
+    if in_session_loop():
+        coro.close()
+        raise RuntimeError("run_in_session_loop() called from the session loop itself — await the coroutine")
+    return asyncio.run_coroutine_threadsafe(coro, loop).result()
+
+
+# ── Guarded requests (per-host rate limit, adaptive timeout, circuit breaker)
+def _request_ok(status: int) -> bool:
+    return status < 500 and status != 429
+
+
+async def _guarded_get(session: ScraperSession, url: str, headers: Dict = None):
+    """client.get() through the session's HostGuard. Raises HostUnavailable if the circuit is open."""
+    if session.replay is not None:
+        return await session.client.get(url, headers=headers)
+
+    guard = session.guard
+    guard.check(url)
+    await guard.acquire(url)
+    start = time.perf_counter()
+    try:
+        resp = await session.client.get(url, headers=headers, timeout=guard.timeout_for(url, session.timeout))
+    except Exception:
+        guard.record(url, time.perf_counter() - start, ok=False)
+        raise
+    guard.record(url, time.perf_counter() - start, ok=_request_ok(resp.status_code), status=resp.status_code)
+    return resp
+
+
+@contextlib.asynccontextmanager
+async def _guarded_stream(session: ScraperSession, url: str, headers: Dict = None, guard: HostGuard = None):
+    """client.stream("GET") through a HostGuard (session.guard by default); latency is time to response headers."""
+    if session.replay is not None:
+        async with session.client.stream("GET", url, headers=headers) as resp:
+            yield resp
+        return
+
+    guard = guard or session.guard
+    guard.check(url)
+    await guard.acquire(url)
+    start = time.perf_counter()
+    connected = False
+    try:
+        async with session.client.stream("GET", url, headers=headers, timeout=guard.timeout_for(url, session.timeout)) as resp:
+            connected = True
+            guard.record(url, time.perf_counter() - start, ok=_request_ok(resp.status_code), status=resp.status_code)
+            yield resp
+    except Exception:
+        if not connected:
+            guard.record(url, time.perf_counter() - start, ok=False)
+        raise
+
+
+# ── Conditional fetch (ETag / Last-Modified via http_cache) ────────────────
+async def _fetch_cached(session: ScraperSession, source: str, url: str, headers: Dict = None, limit: int = None) -> Tuple[int, Optional[str], Optional[List[Dict]], Optional[str]]:
+    """
+    GET a URL with If-None-Match / If-Modified-Since from the on-disk cache.
+    Returns (status, body, cached_tools, next_url):
+    - 304 with a parsed result cached → cached_tools set, body None (skip parsing)
+    - 304 without a parsed result     → cached body returned for parsing
+    - 200                             → fresh body, validators stored
+    next_url is the Link rel="next" page, if any (remembered across 304s).
+    The raw payload is archived under `source` when the session archives.
+    """
+    req_headers = dict(headers or {})
+    if session.use_http_cache:
+        req_headers.update(http_cache.conditional_headers(url))
+    resp = await _guarded_get(session, url, headers=req_headers)
+
+    if resp.status_code == 304:
+        entry = http_cache.load_entry(url) or {}
+        cached_tools = http_cache.load_parsed(url, limit)
+        body = http_cache.load_body(url)
+        session.record_payload(source, url, body, next_url=entry.get("next_url"))
+        if cached_tools is not None:
+            return 304, None, cached_tools, entry.get("next_url")
+        if body is not None:
+            return 304, body, None, entry.get("next_url")
+        # Cache entry vanished between request and response — refetch in full
+        resp = await _guarded_get(session, url, headers=headers)
+
+    if resp.status_code != 200:
+        return resp.status_code, None, None, None
+
+    next_url = resp.links.get("next", {}).get("url")
+    if session.use_http_cache:
+        http_cache.store_response(url, resp.headers, resp.text, next_url=next_url)
+    session.record_payload(source, url, resp.text, next_url=next_url)
+    return 200, resp.text, None, next_url
+
+
+# ── Stream helpers ───────────────────────────────────────────────────────────
+async def _merge_streams(streams: List[AsyncIterator[Dict]]) -> AsyncIterator[Dict]:
+    """Interleave several async iterators, yielding items as soon as any produces one."""
+    queue: asyncio.Queue = asyncio.Queue()
+    done = object()
+
+    async def pump(stream):
+        try:
+            async for item in stream:
+                queue.put_nowait(item)
+        finally:
+            queue.put_nowait(done)
+
+    tasks = [asyncio.create_task(pump(stream)) for stream in streams]
+    try:
+        pending = len(tasks)
+        while pending:
+            item = await queue.get()
+            if item is done:
+                pending -= 1
+                continue
+            yield item
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def _iter_text_lines(text: str) -> AsyncIterator[str]:
+    for line in text.splitlines():
+        yield line
+
+
+# ── Source 1: GitHub Awesome Lists (most reliable — plain markdown) ──────────
+AWESOME_LIST_URLS = [
+    "https://raw.githubusercontent.com/mahseema/awesome-ai-tools/main/README.md",
+]
+GITHUB_LIMIT = 500
+
+# Match: - [Tool Name](url) - description
+AWESOME_ITEM_RE = re.compile(r"\s*[-*]\s+\[([^\]]+)\]\(([^)]+)\)\s*[-–:]\s*(.+)")
+# Match: ## Section / ### Sub-section (used as a category hint)
+AWESOME_HEADING_RE = re.compile(r"\s*#{2,6}\s+(.+?)\s*#*\s*$")
+_HEADING_NOISE_RE = re.compile(r"^[^\w]+|[^\w)]+$")
+
+
+def _parse_awesome_line(line: str, section: Optional[str]) -> Optional[Dict]:
+    match = AWESOME_ITEM_RE.match(line)
+    if not match:
+        return None
+    name = match.group(1).strip()
+    desc = match.group(3).strip()
+    if not (len(name) > 2 and len(desc) > 15 and len(name) < 60):
+        return None
+    tool = {
+        "name": name,
+        "description": desc[:500],
+        "source": "GitHub Awesome AI Tools",
+    }
+    link = match.group(2).strip()
+    if link.startswith(("http://", "https://")):
+        tool["url"] = link
+    if section:
+        tool["category_hint"] = section
+    return tool
+
+
+async def _iter_awesome_list(session: ScraperSession, url: str, limit: int) -> AsyncIterator[Dict]:
+    """
+    Stream one awesome-list README line by line (conditional GET via http_cache).
+    Stops reading as soon as `limit` tools have been yielded.
+    """
+    tools = []
+    section = None
+    source = "GitHub Awesome AI Tools"
+    headers = http_cache.conditional_headers(url) if session.use_http_cache else {}
+    try:
+        async with _guarded_stream(session, url, headers=headers) as resp:
+            streaming = resp.status_code == 200
+            if resp.status_code == 304:
+                cached = http_cache.load_parsed(url, limit)
+                body = http_cache.load_body(url)
+                entry = http_cache.load_entry(url) or {}
+                # The body is the prefix that was read when the last 200 stopped at the
+                # budget — enough to replay the cached tools, which are that same prefix
+                session.record_payload(source, url, body)
+                if cached is not None:
+                    print(f"[Scraper] GitHub list unchanged (304) — {len(cached[:limit])} cached tools")
+                    if len(cached) >= limit and not (len(cached) == limit and entry.get("complete", True)):
+                        session.partial_sources.add("GitHub Awesome List")   # cut at the item budget
+                    for tool in cached[:limit]:
+                        yield tool
+                    return
+                if body is None or not entry.get("complete", True):
+                    # Validators without anything usable behind them (or just a prefix
+                    # shorter than this run's budget) — start over
+                    http_cache.drop_entry(url)
+                    async for tool in _iter_awesome_list(session, url, limit):
+                        yield tool
+                    return
+                lines = _iter_text_lines(body)
+            elif streaming:
+                lines = resp.aiter_lines()
+            else:
                 print(f"[Scraper] GitHub list returned {resp.status_code}")
-                return []
-
-            for line in resp.text.split("\n"):
-                # Match: - [Tool Name](url) - description
-                match = re.match(r"\s*[-*]\s+\[([^\]]+)\]\(([^)]+)\)\s*[-–:]\s*(.+)", line)
-                if match:
-                    name = match.group(1).strip()
-                    desc = match.group(3).strip()
-                    if len(name) > 2 and len(desc) > 15 and len(name) < 60:
-                        tools.append({
-                            "name": name,
-                            "description": desc[:500],
-                            "source": "GitHub Awesome AI Tools",
-                        })
-
-        print(f"[Scraper] Found {len(tools)} tools from GitHub Awesome List")
+                session.partial_sources.add("GitHub Awesome List")
+                return
+
+            raw = []
+            complete = True
+            async for line in lines:
+                if streaming:
+                    raw.append(line)
+                heading = AWESOME_HEADING_RE.match(line)
+                if heading:
+                    section = _HEADING_NOISE_RE.sub("", heading.group(1)) or None
+                    continue
+                tool = _parse_awesome_line(line, section)
+                if tool:
+                    tools.append(tool)
+                    yield tool
+                    if len(tools) >= limit:
+                        # Stopped at the item budget: what's left unread may still be listed
+                        complete = False
+                        session.partial_sources.add("GitHub Awesome List")
+                        break
+
+            if streaming:
+                # An early stop archives (and replays) just the prefix that was read
+                session.record_payload(source, url, "\n".join(raw))
+            if session.use_http_cache:
+                if streaming:
+                    # An early stop keeps the prefix too, so later 304 runs have it to archive
+                    http_cache.store_response(url, resp.headers, "\n".join(raw))
+                http_cache.store_parsed(url, tools, complete=complete)
+
+        print(f"[Scraper] Found {len(tools)} tools from {url.split('/')[4]} awesome list")
     except Exception as e:
-        print(f"[Scraper] GitHub list error: {e}")
+        print(f"[Scraper] GitHub list error ({url}): {e}")
+        session.partial_sources.add("GitHub Awesome List")
+
+
+async def iter_github_awesome_list(session: ScraperSession = None, limit: int = None, urls: List[str] = None) -> AsyncIterator[Dict]:
+    """
+    Streams tools from curated 'Awesome AI Tools' GitHub READMEs, all lists concurrently.
+    GitHub raw markdown is always accessible — no JS, no auth, no blocking.
+    Reading stops as soon as `limit` tools have been yielded in total.
+    """
+    session = session or get_session()
+    limit = limit or GITHUB_LIMIT
+    found = 0
+    streams = [_iter_awesome_list(session, url, limit) for url in (urls or AWESOME_LIST_URLS)]
+    merged = _merge_streams(streams)
+    try:
+        async for tool in merged:
+            found += 1
+            yield tool
+            if found >= limit:
+                session.partial_sources.add("GitHub Awesome List")
+                break
+    finally:
+        await merged.aclose()
+
 
-    return tools[:40]
+async def scrape_github_awesome_list(session: ScraperSession = None) -> List[Dict]:
+    return [t async for t in iter_github_awesome_list(session)]
 
 
 # ── Source 2: Hugging Face Spaces public API (JSON, no auth needed) ──────────
-async def scrape_huggingface_spaces() -> List[Dict]:
+HF_SPACES_API = "https://huggingface.co/api/spaces"
+HF_ITEM_BUDGET = 1000      # max spaces per run
+HF_PAGE_SIZE = 100
+# Field projection — only download what _parse_hf_space reads
+HF_EXPAND_FIELDS = ["cardData", "tags", "lastModified", "likes"]
+
+
+def _hf_first_page_url(page_size: int) -> str:
+    params = [("sort", "likes"), ("direction", "-1"), ("limit", str(page_size))]
+    params += [("expand[]", field) for field in HF_EXPAND_FIELDS]
+    return f"{HF_SPACES_API}?{urlencode(params)}"
+
+
+def _parse_hf_space(space: Dict) -> Optional[Dict]:
+    name = space.get("id", "").split("/")[-1].replace("-", " ").title()
+    if not name:
+        return None
+    card = space.get("cardData") or {}
+    desc = card.get("short_description", "")
+    if not desc or len(desc) < 10:
+        tags = space.get("tags", [])
+        desc = f"AI tool on Hugging Face. Tags: {', '.join(tags[:5])}" if tags else "AI tool hosted on Hugging Face Spaces."
+    return {
+        "name": name[:80],
+        "description": desc[:500],
+        "source": "Hugging Face Spaces",
+        "url": f"https://huggingface.co/spaces/{space['id']}",
+        "last_modified": space.get("lastModified"),
+    }
+
+
+async def iter_huggingface_spaces(session: ScraperSession = None, budget: int = None, page_size: int = None) -> AsyncIterator[Dict]:
     """
-    Uses HuggingFace public REST API — returns open AI spaces/apps in JSON.
-    No API key required.
+    Uses HuggingFace public REST API — streams open AI spaces/apps from JSON.
+    No API key required. Follows the Link rel="next" cursor until `budget`
+    spaces have been yielded; the next page is fetched while the current one
+    is being parsed and consumed, so only ~2 pages are ever held in memory.
     """
-    url = "https://huggingface.co/api/spaces?limit=30&sort=likes&direction=-1"
-    tools = []
+    session = session or get_session()
+    source = "Hugging Face Spaces"
+    headers = {"User-Agent": "Mozilla/5.0"}
+    budget = budget or HF_ITEM_BUDGET
+    page_size = min(page_size or HF_PAGE_SIZE, budget)
+    found = 0
+    pages = 0
+    page_url = _hf_first_page_url(page_size)
+    fetch = asyncio.ensure_future(_fetch_cached(session, source, page_url, headers=headers))
 
     try:
-        async with httpx.AsyncClient(timeout=15) as client:
-            resp = await client.get(url, headers={"User-Agent": "Mozilla/5.0"})
-            if resp.status_code != 200:
-                print(f"[Scraper] HuggingFace API returned {resp.status_code}")
-                return []
-
-            for space in resp.json():
-                name = space.get("id", "").split("/")[-1].replace("-", " ").title()
-                card = space.get("cardData") or {}
-                desc = card.get("short_description", "")
-                if not desc or len(desc) < 10:
-                    tags = space.get("tags", [])
-                    desc = f"AI tool on Hugging Face. Tags: {', '.join(tags[:5])}" if tags else "AI tool hosted on Hugging Face Spaces."
-                if name:
-                    tools.append({"name": name[:80], "description": desc[:500], "source": "Hugging Face Spaces"})
-
-        print(f"[Scraper] Found {len(tools)} tools from Hugging Face")
+        while fetch is not None:
+            status, body, cached, next_url = await fetch
+            fetch = None
+            if cached is None and body is None:
+                print(f"[Scraper] HuggingFace API returned {status}")
+                session.partial_sources.add("Hugging Face Spaces")
+                break
+            pages += 1
+
+            # Cursor pagination is sequential — the best we can do is keep
+            # exactly one page in flight ahead of the parser.
+            if next_url and found + page_size < budget:
+                fetch = asyncio.ensure_future(_fetch_cached(session, source, next_url, headers=headers))
+
+            if cached is not None:
+                page_tools = cached
+            else:
+                page_tools = [t for t in map(_parse_hf_space, json.loads(body)) if t]
+                if session.use_http_cache:
+                    http_cache.store_parsed(page_url, page_tools)
+            page_url = next_url
+
+            remaining = len(page_tools) - (budget - found)
+            for tool in page_tools[:budget - found]:
+                found += 1
+                yield tool
+            if found >= budget:
+                if remaining > 0 or next_url:
+                    # Stopped at the item budget — spaces past it are still listed upstream
+                    session.partial_sources.add("Hugging Face Spaces")
+                break
+
+        print(f"[Scraper] Found {found} tools from Hugging Face ({pages} pages)")
     except Exception as e:
         print(f"[Scraper] HuggingFace error: {e}")
+        session.partial_sources.add("Hugging Face Spaces")
+    finally:
+        if fetch is not None:
+            fetch.cancel()
 
-    return tools
+
+async def scrape_huggingface_spaces(session: ScraperSession = None) -> List[Dict]:
+    return [t async for t in iter_huggingface_spaces(session)]
 
 
 # ── Source 3: There's An AI For That (Playwright — local only) ───────────────
-async def scrape_theresanaiforthat() -> List[Dict]:
-    """Playwright scraper — skipped automatically on Streamlit Cloud."""
+TAAFT_URLS = ["https://theresanaiforthat.com"]
+TAAFT_CARD_SELECTOR = "article, div[class*='card'], div[class*='tool'], li[class*='tool']"
+TAAFT_MAX_SCROLLS = 8
+TAAFT_GOTO_TIMEOUT = 30               # seconds — upper bound for the adaptive timeout
+TAAFT_FIRST_CARD_TIMEOUT_MS = 10000   # wait for the first card instead of sleeping
+TAAFT_GROWTH_TIMEOUT_MS = 1500        # stop scrolling once no new cards appear within this
+
+
+async def _scroll_until_stable(page) -> int:
+    """
+    Scroll until the card count stops growing (or the network goes idle with
+    no new cards). Returns the final card count.
+    """
+    await page.wait_for_selector(TAAFT_CARD_SELECTOR, timeout=TAAFT_FIRST_CARD_TIMEOUT_MS)
+    count = await page.locator(TAAFT_CARD_SELECTOR).count()
+
+    for _ in range(TAAFT_MAX_SCROLLS):
+        await page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
+        try:
+            await page.wait_for_function(
+                "([sel, n]) => document.querySelectorAll(sel).length > n",
+                arg=[TAAFT_CARD_SELECTOR, count],
+                timeout=TAAFT_GROWTH_TIMEOUT_MS,
+            )
+        except PlaywrightTimeoutError:
+            # No growth yet — give in-flight requests a chance to settle once
+            with contextlib.suppress(PlaywrightTimeoutError):
+                await page.wait_for_load_state("networkidle", timeout=TAAFT_GROWTH_TIMEOUT_MS)
+            if await page.locator(TAAFT_CARD_SELECTOR).count() <= count:
+                break
+        count = await page.locator(TAAFT_CARD_SELECTOR).count()
+
+    return count
+
+
+async def _parse_taaft_html(html: str) -> List[Dict]:
+    """Card extraction runs in html_parser's process pool, off the event loop."""
     tools = []
+    for name, desc in await html_parser.extract_cards_async(html, TAAFT_CARD_SELECTOR, 25):
+        if 2 < len(name) < 80 and len(desc) > 15:
+            tools.append({"name": name, "description": desc[:500], "source": "There's An AI For That"})
+    return tools
+
+
+async def _scrape_taaft_page(session: ScraperSession, url: str) -> List[Dict]:
+    if session.replay is not None:
+        html = session.replay.body(url)
+        return await _parse_taaft_html(html) if html is not None else []
+
+    guard = session.guard
+    guard.check(url)
+    await guard.acquire(url)
+    async with session.browser.page() as page:
+        start = time.perf_counter()
+        try:
+            await page.goto(url, wait_until="domcontentloaded", timeout=guard.timeout_for(url, TAAFT_GOTO_TIMEOUT) * 1000)
+        except Exception:
+            guard.record(url, time.perf_counter() - start, ok=False)
+            raise
+        guard.record(url, time.perf_counter() - start, ok=True)
+        await _scroll_until_stable(page)
+        html = await page.content()
+    session.record_payload("There's An AI For That", url, html)
+    return await _parse_taaft_html(html)
+
+
+class SourceSkipped(Exception):
+    """Raised by a source that can't run here (e.g. no Playwright) — timed as "skipped", not "ok"."""
 
-    if not PLAYWRIGHT_AVAILABLE:
-        print("[Scraper] Playwright not available (cloud mode) — skipping TAAFT")
+
+async def iter_theresanaiforthat(session: ScraperSession = None, urls: List[str] = None) -> AsyncIterator[Dict]:
+    """
+    Playwright scraper — skipped automatically on Streamlit Cloud.
+    Listing pages are scraped in parallel tabs of the session's browser pool;
+    each page's tools are yielded as soon as that page is done.
+    """
+    session = session or get_session()
+    if not PLAYWRIGHT_AVAILABLE and session.replay is None:
+        session.partial_sources.add("There's An AI For That")
+        raise SourceSkipped("Playwright not available (cloud mode)")
+
+    tasks = [asyncio.ensure_future(_scrape_taaft_page(session, url)) for url in (urls or TAAFT_URLS)]
+    found = 0
+    try:
+        for next_done in asyncio.as_completed(tasks):
+            try:
+                page_tools = await next_done
+            except Exception as e:
+                print(f"[Scraper] TAAFT error: {e}")
+                session.partial_sources.add("There's An AI For That")
+                continue
+            for tool in page_tools:
+                found += 1
+                yield tool
+    finally:
+        for task in tasks:
+            task.cancel()
+
+    print(f"[Scraper] Found {found} tools from There's An AI For That")
+
+
+async def scrape_theresanaiforthat(session: ScraperSession = None, urls: List[str] = None) -> List[Dict]:
+    try:
+        return [t async for t in iter_theresanaiforthat(session, urls)]
+    except SourceSkipped as e:
+        print(f"[Scraper] Skipping TAAFT: {e}")
         return []
 
+
+# ── Optional stage: homepage metadata enrichment ─────────────────────────────
+ENRICH_CONCURRENCY = 16          # homepage fetches in flight overall
+ENRICH_PER_HOST = 2              # ...and per host (HostGuard also rate-limits each host)
+ENRICH_MAX_BYTES = 256 * 1024    # stop reading once <head> is in — meta tags live there
+ENRICH_THIN_DESC_CHARS = 60      # shorter (or generated) descriptions get the page's
+ENRICH_META_MAX_AGE = 7 * 24 * 3600   # seconds a homepage's cached meta is reused
+
+
+def _is_thin_description(desc: str) -> bool:
+    return len(desc) < ENRICH_THIN_DESC_CHARS or desc.lower().startswith(GENERATED_DESC_PREFIXES)
+
+
+async def _fetch_page_head(session: ScraperSession, url: str) -> Optional[str]:
+    chunks = []
+    size = 0
+    async with _guarded_stream(session, url, headers={"User-Agent": BROWSER_USER_AGENT}, guard=session.page_guard) as resp:
+        content_type = resp.headers.get("content-type", "")
+        if resp.status_code != 200 or (content_type and "html" not in content_type):
+            return None
+        async for chunk in resp.aiter_bytes():
+            chunks.append(chunk)
+            size += len(chunk)
+            if size >= ENRICH_MAX_BYTES or b"</head>" in chunk.lower():
+                break
+        html = b"".join(chunks).decode(resp.encoding or "utf-8", errors="replace")
+    session.record_payload("Homepage", url, html)
+    return html
+
+
+async def _enrich_tool(session: ScraperSession, tool: Dict, host_slots: Dict[str, asyncio.Semaphore]) -> Dict:
+    url = tool["url"]
+    meta = http_cache.load_page_meta(url, ENRICH_META_MAX_AGE) if session.use_http_cache else None
+    if meta is None:
+        slot = host_slots.setdefault(urlsplit(url).hostname or url, asyncio.Semaphore(ENRICH_PER_HOST))
+        try:
+            async with slot:
+                html = await _fetch_page_head(session, url)
+        except Exception:
+            return tool  # best-effort — the page guard has already recorded the failure
+        if not html:
+            return tool
+        meta = html_parser.extract_page_meta(html)
+        if session.use_http_cache:
+            http_cache.store_page_meta(url, meta)
+
+    enriched = dict(tool)
+    if meta["description"] and _is_thin_description(tool["description"]):
+        enriched["description"] = meta["description"][:500]
+    if meta["title"]:
+        enriched["homepage_title"] = meta["title"][:120]
+    if meta["keywords"]:
+        enriched["homepage_keywords"] = meta["keywords"][:200]
+    return enriched
+
+
+async def enrich_homepages(tools: AsyncIterator[Dict], session: ScraperSession = None, concurrency: int = ENRICH_CONCURRENCY) -> AsyncIterator[Dict]:
+    """
+    Fetch each tool's linked homepage and fold in og:description / title / keywords.
+    Thin descriptions are replaced; keywords feed the keyword classifier.
+    Only tools with a thin description, or no homepage keywords yet, are
+    looked up, and a page's meta is cached for ENRICH_META_MAX_AGE. Fetches go
+    through session.page_guard, so they never spend the rate budget or trip
+    the circuit of the source APIs on the same host.
+    Bounded concurrency; tools are yielded as their fetch finishes, and tools
+    without a URL pass straight through.
+    """
+    session = session or get_session()
+    host_slots: Dict[str, asyncio.Semaphore] = {}
+    in_flight = set()
+    enriched = 0
     try:
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(headless=True)
-            context = await browser.new_context(
-                user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/122.0.0.0 Safari/537.36",
-                viewport={"width": 1280, "height": 800},
-            )
-            page = await context.new_page()
-            await page.route("**/*.{png,jpg,jpeg,gif,webp,woff,woff2}", lambda r: r.abort())
-            await page.goto("https://theresanaiforthat.com", wait_until="domcontentloaded", timeout=30000)
-            await asyncio.sleep(3)
-            for _ in range(4):
-                await page.evaluate("window.scrollBy(0, 800)")
-                await asyncio.sleep(1)
-            html = await page.content()
-            await browser.close()
-
-        soup = BeautifulSoup(html, "html.parser")
-        for card in soup.select("article, div[class*='card'], div[class*='tool'], li[class*='tool']")[:25]:
-            name_tag = card.find(["h2", "h3", "h4", "strong"])
-            desc_tag = card.find("p")
-            if name_tag and desc_tag:
-                name = name_tag.get_text(strip=True)
-                desc = desc_tag.get_text(strip=True)
-                if 2 < len(name) < 80 and len(desc) > 15:
-                    tools.append({"name": name, "description": desc[:500], "source": "There's An AI For That"})
-
-        print(f"[Scraper] Found {len(tools)} tools from There's An AI For That")
-    except Exception as e:
-        print(f"[Scraper] TAAFT error: {e}")
+        async for tool in tools:
+            if not tool.get("url") or (tool.get("homepage_keywords") and not _is_thin_description(tool["description"])):
+                yield tool
+                continue
+            if len(in_flight) >= concurrency:
+                done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    enriched += 1
+                    yield task.result()
+            in_flight.add(asyncio.create_task(_enrich_tool(session, tool, host_slots)))
 
-    return tools
+            done = {task for task in in_flight if task.done()}
+            in_flight -= done
+            for task in done:
+                enriched += 1
+                yield task.result()
+
+        while in_flight:
+            done, in_flight = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                enriched += 1
+                yield task.result()
+    finally:
+        for task in in_flight:
+            task.cancel()
+
+    print(f"[Scraper] Homepage enrichment: {enriched} tools looked up")
 
 
 # ── Main entry point ──────────────────────────────────────────────────────────
-async def scrape_all_sources() -> List[Dict]:
-    """Run all scrapers, merge results, deduplicate. Falls back to sample data if needed."""
-    all_tools = []
-
-    # Concurrent HTTP scrapers
-    print("[Scraper] Fetching GitHub Awesome List + HuggingFace API...")
-    results = await asyncio.gather(
-        scrape_github_awesome_list(),
-        scrape_huggingface_spaces(),
-        return_exceptions=True,
-    )
-    for r in results:
-        if isinstance(r, list):
-            all_tools.extend(r)
-
-    # Playwright scraper
-    print("[Scraper] Launching Playwright for There's An AI For That...")
-    taaft = await scrape_theresanaiforthat()
-    all_tools.extend(taaft)
+# Per-source deadline (seconds). A source that overruns is cut off; tools it
+# already yielded are kept and the run continues with the other sources.
+SOURCE_TIMEOUTS = {
+    "GitHub Awesome List": 20,
+    "Hugging Face Spaces": 90,     # paginated — up to HF_ITEM_BUDGET spaces
+    "There's An AI For That": 45,
+}
+
+
+async def _pump_source(name: str, source: AsyncIterator[Dict], timeout: float, queue: asyncio.Queue, timings: Optional[List[Dict]]):
+    """Drain one source into the shared queue under its deadline. Never raises."""
+    start = time.perf_counter()
+    status = "ok"
+    count = 0
+    try:
+        async with asyncio.timeout(timeout):
+            async for tool in source:
+                count += 1
+                queue.put_nowait((name, tool))
+    except TimeoutError:
+        status = "timeout"
+        print(f"[Scraper] {name} exceeded {timeout}s deadline — keeping {count} tools")
+    except SourceSkipped as e:
+        status = "skipped"
+        print(f"[Scraper] Skipping {name}: {e}")
+    except asyncio.CancelledError:
+        status = "cancelled"
+        raise
+    except Exception as e:
+        status = "error"
+        print(f"[Scraper] {name} failed: {e}")
+    finally:
+        await source.aclose()
+        timing = {
+            "source": name,
+            "seconds": round(time.perf_counter() - start, 2),
+            "tools": count,
+            "status": status,
+        }
+        print(f"[Scraper]   {name}: {count} tools in {timing['seconds']}s ({status})")
+        if timings is not None:
+            timings.append(timing)
+        queue.put_nowait((name, None))  # end-of-source marker
+
+
+async def _iter_deduped_sources(session: ScraperSession, timings: Optional[List[Dict]],
+                                state: Optional[ScrapeState] = None) -> AsyncIterator[Dict]:
+    queue: asyncio.Queue = asyncio.Queue()
+    timings = timings if timings is not None else []
+    sources = [
+        ("GitHub Awesome List", iter_github_awesome_list(session)),
+        ("Hugging Face Spaces", iter_huggingface_spaces(session)),
+        ("There's An AI For That", iter_theresanaiforthat(session)),
+    ]
+    index = NearDuplicateIndex()
+    live = 0
+    # A record is yielded as soon as it is first seen. A duplicate from another
+    # source arriving later is merged into it in place (dedup.merge_into — the
+    # survivor doesn't depend on which source answered first), and if that
+    # changed the record it is yielded again under the same record_id.
+    # Duplicates within one source keep its first listing.
+    origin: Dict[int, str] = {}      # record_id → source the record is observed under
+    emitted: set = set()             # record_ids yielded so far
+
+    def observe(tool: Dict) -> bool:
+        """Record the tool in the scrape state; True if it is new/changed (or there is no state)."""
+        return state is None or state.observe(origin[tool["record_id"]], tool)
+
+    # Plain tasks rather than a TaskGroup: a TaskGroup can't be suspended
+    # across `yield` (closing the generator early would surface as an
+    # ExceptionGroup), so cleanup is done by hand in `finally`.
+    tasks = [
+        asyncio.create_task(_pump_source(name, source, SOURCE_TIMEOUTS[name], queue, timings))
+        for name, source in sources
+    ]
+    try:
+        pending = len(tasks)
+        while pending:
+            name, tool = await queue.get()
+            if tool is None:
+                pending -= 1
+                continue
+            live += 1
+            if len(tool["name"].strip()) <= 1:
+                continue
+            match = index.add(tool)
+            if match is None:
+                tool["record_id"] = len(origin)
+                origin[tool["record_id"]] = name
+                if observe(tool):
+                    emitted.add(tool["record_id"])
+                    yield tool
+            elif origin[match["record_id"]] != name:
+                before = dict(match)
+                if merge_into(match, tool):
+                    origin[before["record_id"]] = name
+                match["record_id"] = before["record_id"]
+                # observe() either way, so the record is also known under its new source
+                if match != before and (observe(match) or match["record_id"] in emitted):
+                    emitted.add(match["record_id"])
+                    yield match
+    finally:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
 
     # Supplement with sample data if live scraping is sparse
-    if len(all_tools) < 10:
-        print(f"[Scraper] Only {len(all_tools)} live tools found — adding sample data as supplement")
-        all_tools.extend(SAMPLE_TOOLS)
-
-    # Deduplicate
-    seen, unique = set(), []
-    for t in all_tools:
-        key = t["name"].lower().strip()
-        if key not in seen and len(key) > 1:
-            seen.add(key)
-            unique.append(t)
+    if live < 10:
+        print(f"[Scraper] Only {live} live tools found — adding sample data as supplement")
+        for tool in map(dict, SAMPLE_TOOLS):
+            if index.add(tool) is None:
+                tool["record_id"] = len(origin)
+                origin[tool["record_id"]] = "Sample"
+                if observe(tool):
+                    emitted.add(tool["record_id"])
+                    yield tool
+    if index.merged:
+        print(f"[Scraper] Merged {index.merged} near-duplicate tools across sources")
+
+    if state is not None:
+        # Only sources that ran to completion may tombstone what they no longer list;
+        # sample data always counts as complete so it drops out once live scraping recovers
+        for timing in timings:
+            if timing["status"] == "ok" and timing["source"] not in session.partial_sources:
+                state.mark_complete(timing["source"])
+        state.mark_complete("Sample")
+        print(f"[Scraper] Incremental: skipped {len(origin) - len(emitted)} unchanged tools")
+
+
+async def iter_all_sources(session: ScraperSession = None, timings: List[Dict] = None, replay_run: str = None,
+                           archive_raw: bool = archive.ARCHIVE_RAW_PAYLOADS, enrich: bool = False,
+                           state: ScrapeState = None) -> AsyncIterator[Dict]:
+    """
+    Run all scrapers concurrently and yield near-deduplicated tools as they
+    are produced, so classification can start before scraping ends. Each
+    record carries a record_id; when a near-duplicate from a slower source
+    is merged into an already-yielded record, the updated record is yielded
+    again with the same record_id and supersedes the earlier one (collect
+    with collect_tools()). Falls back to sample data if live scraping is sparse.
+    Per-source timing dicts are appended to `timings` as sources finish.
+    Live runs archive their raw payloads (see archive.py); replay_run="<run id>"
+    or "latest" re-parses an archived run with no network.
+    enrich=True adds the homepage metadata stage (enrich_homepages) after dedup.
+    With a ScrapeState only new/changed tools are yielded; once the stream is
+    exhausted state.tombstones() lists removed ones, and state.commit() records
+    the run (left to the caller, after it has stored the results).
+    """
+    if replay_run:
+        session = ScraperSession(replay_run=replay_run)
+        print(f"[Scraper] Replaying archived run {session.replay.run_id} (offline)")
+    else:
+        session = session or get_session()
+        if archive_raw:
+            session.archive_run = archive.ArchiveRun()
+        print("[Scraper] Fetching GitHub Awesome List + HuggingFace API + There's An AI For That...")
+
+    session.partial_sources = set()
+    stream = _iter_deduped_sources(session, timings, state)
+    if enrich:
+        stream = enrich_homepages(stream, session)
+    try:
+        async for tool in stream:
+            yield tool
+    finally:
+        await stream.aclose()
+        if session.archive_run is not None:
+            session.archive_run.close()
+            session.archive_run = None
+        if session.replay is None:
+            session.guard.save()
+            if enrich:
+                session.page_guard.save()
+        if not in_session_loop():
+            # A throwaway loop (bare asyncio.run()) — its sockets and browser die with it
+            await session.aclose()
+
+
+async def collect_tools(tools: AsyncIterator[Dict]) -> List[Dict]:
+    """The records of an iter_all_sources() stream, latest version of each, in first-seen order."""
+    latest: Dict[int, Dict] = {}
+    async for tool in tools:
+        latest[tool.get("record_id", id(tool))] = tool
+    return list(latest.values())
+
+
+async def scrape_all_sources(session: ScraperSession = None, return_timings: bool = False, replay_run: str = None, enrich: bool = False):
+    """
+    Collect iter_all_sources() into a list.
+    Wall-clock time is the slowest source (capped by SOURCE_TIMEOUTS), not the sum.
+    With return_timings=True returns (tools, timings) — one timing dict per source.
+    """
+    timings = []
+    unique = await collect_tools(iter_all_sources(session, timings=timings, replay_run=replay_run, enrich=enrich))
 
     print(f"[Scraper] Total unique tools collected: {len(unique)}")
+    if return_timings:
+        return unique, timings
     return unique
 
 
@@ -0,0 +1,134 @@
+"""
+test_scraper.py - Incremental scraping against mock_upstream.py (no live sites touched)
+Run: python -m pytest -q test_scraper.py
+"""
+
+import asyncio
+
+import pytest
+
+import host_guard
+import scraper
+from host_guard import HostGuard
+from mock_upstream import MockUpstream
+from scrape_state import ScrapeState
+
+
+@pytest.fixture
+def upstream(tmp_path, monkeypatch):
+    # Cache, archive and state files are relative paths — keep them in tmp_path
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setitem(host_guard.HOST_RATE_LIMITS, "127.0.0.1", (10_000, 10_000))
+    monkeypatch.setattr(scraper, "PLAYWRIGHT_AVAILABLE", False)
+    with MockUpstream(awesome_items=30, spaces=40, taaft_cards=5, latency_ms=0) as server:
+        monkeypatch.setattr(scraper, "AWESOME_LIST_URLS", [server.awesome_url])
+        monkeypatch.setattr(scraper, "HF_SPACES_API", server.spaces_api)
+        monkeypatch.setattr(scraper, "TAAFT_URLS", [server.taaft_url])
+        monkeypatch.setattr(scraper, "GITHUB_LIMIT", 100)
+        yield server
+
+
+def _incremental_run(state: ScrapeState):
+    async def run():
+        session = scraper.ScraperSession()
+        session.guard = HostGuard(path="host_state_test.json")
+        tools = await scraper.collect_tools(scraper.iter_all_sources(session, archive_raw=False, state=state))
+        return tools, session
+
+    return asyncio.run(run())
+
+
+def test_full_listing_marks_source_complete(upstream, monkeypatch):
+    monkeypatch.setattr(scraper, "HF_ITEM_BUDGET", 40)
+    state = ScrapeState()
+    _, session = _incremental_run(state)
+    assert "Hugging Face Spaces" not in session.partial_sources
+    assert "Hugging Face Spaces" in state._complete
+
+
+def test_item_budget_does_not_tombstone_the_rest(upstream, monkeypatch):
+    monkeypatch.setattr(scraper, "HF_ITEM_BUDGET", 40)
+    first = ScrapeState()
+    _incremental_run(first)
+    first.commit()
+
+    # Same upstream listing, smaller budget: the 20 spaces past it still exist
+    monkeypatch.setattr(scraper, "HF_ITEM_BUDGET", 20)
+    second = ScrapeState()
+    _, session = _incremental_run(second)
+    assert "Hugging Face Spaces" in session.partial_sources
+    assert not [t for t in second.tombstones() if t["source"] == "Hugging Face Spaces"]
+
+
+def test_github_limit_marks_list_partial(upstream, monkeypatch):
+    monkeypatch.setattr(scraper, "GITHUB_LIMIT", 10)
+    state = ScrapeState()
+    _, session = _incremental_run(state)
+    assert "GitHub Awesome List" in session.partial_sources
+    assert "GitHub Awesome List" not in state._complete
+
+
+def _archived_run(replay_run: str = None):
+    async def run():
+        session = None if replay_run else scraper.ScraperSession()
+        if session:
+            session.guard = HostGuard(path="host_state_test.json")
+        return await scraper.collect_tools(scraper.iter_all_sources(session, replay_run=replay_run, archive_raw=True))
+
+    return asyncio.run(run())
+
+
+def test_unchanged_truncated_list_is_still_replayable(upstream, monkeypatch):
+    monkeypatch.setattr(scraper, "GITHUB_LIMIT", 10)
+    _archived_run()
+    live = _archived_run()        # README unchanged: a 304 served from the cache
+    replayed = _archived_run(replay_run="latest")
+    github = [t["name"] for t in live if t["source"] == "GitHub Awesome AI Tools"]
+    assert len(github) == 10
+    assert [t["name"] for t in replayed if t["source"] == "GitHub Awesome AI Tools"] == github
+
+
+def test_fast_source_streams_and_late_duplicate_updates_it(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    copy = "Writes and refactors code in your editor from plain English instructions."
+
+    def source(tools, delay):
+        async def iterate(session=None):
+            await asyncio.sleep(delay)
+            for tool in tools:
+                yield tool
+        return iterate
+
+    monkeypatch.setattr(scraper, "iter_github_awesome_list", source(
+        [{"name": "CodePilot", "description": "AI pair programmer.", "source": "GitHub Awesome AI Tools"}], 0))
+    monkeypatch.setattr(scraper, "iter_huggingface_spaces", source(
+        [{"name": "codepilot", "description": copy, "source": "Hugging Face Spaces"}], 0.3))
+    monkeypatch.setattr(scraper, "iter_theresanaiforthat", source([], 0))
+
+    async def run():
+        seen = []
+        start = asyncio.get_running_loop().time()
+        async for tool in scraper.iter_all_sources(scraper.ScraperSession(), archive_raw=False):
+            if tool["name"] == "CodePilot":
+                seen.append((asyncio.get_running_loop().time() - start, dict(tool)))
+        return seen
+
+    seen = asyncio.run(run())
+    # Yielded before the slower source finished, then again once its duplicate was merged in
+    assert seen[0][0] < 0.3 and seen[0][1]["description"] == "AI pair programmer."
+    assert len(seen) == 2 and seen[1][1]["record_id"] == seen[0][1]["record_id"]
+    assert seen[1][1]["description"] == copy
+    assert seen[1][1]["source"] == "GitHub Awesome AI Tools"
+
+
+def test_taaft_without_playwright_is_reported_skipped(upstream):
+    async def run():
+        timings = []
+        session = scraper.ScraperSession()
+        session.guard = HostGuard(path="host_state_test.json")
+        await scraper.collect_tools(scraper.iter_all_sources(session, timings=timings, archive_raw=False))
+        return {t["source"]: t["status"] for t in timings}
+
+    statuses = asyncio.run(run())
+    assert statuses["There's An AI For That"] == "skipped"
+    assert statuses["GitHub Awesome List"] == "ok"